@@ -140,40 +140,29 @@ def main() -> None:
     pipeline = Pipeline[Data](name="test-pipeline", controllers_or_phases=controller)
     pip_ex_id = pipeline.register_instance()
 
-    counter = 0
-    counter_mutex = threading.Lock()
+    done_semaphore = threading.Semaphore(0) # Released once by the callbacks for every finished data package
     def callback(dp: DataPackage[Data]) -> None:
-        nonlocal counter, counter_mutex
         print(f"OK: {dp.data}")
-        with counter_mutex:
-            counter = counter + 1
+        done_semaphore.release()
 
     def exit_callback(dp: DataPackage[Data]) -> None:
-        nonlocal counter, counter_mutex
         # get last module in the pipeline
         print(f"EXIT: {dp.data}")
 
-        with counter_mutex:
-            counter = counter + 1
+        done_semaphore.release()
 
     def overflown_callback(dp: DataPackage[Data]) -> None:
-        nonlocal counter, counter_mutex
         print(f"OVERFLOWN: {dp.data}")
-        with counter_mutex:
-            counter = counter + 1
+        done_semaphore.release()
             
     def outdated_callback(dp: DataPackage[Data]) -> None:
-        nonlocal counter, counter_mutex
         print(f"OUTDATED: {dp.data}")
-        with counter_mutex:
-            counter = counter + 1
+        done_semaphore.release()
 
     def error_callback(dp: DataPackage[Data]) -> None:
-        nonlocal counter, counter_mutex
         f_json = format_json(f"{dp.errors[0]}")
         print(f"ERROR: {f_json}")
-        with counter_mutex:
-            counter = counter + 1
+        done_semaphore.release()
 
     # Function to execute the processing pipeline
     def process_data(data: Data) -> Union[DataPackage, None]:
@@ -196,11 +185,9 @@ def main() -> None:
     for d in data_list:
         dp = process_data(d)
 
-    # Keep the main thread alive
-    while True:
-        time.sleep(0.001)
-        if counter >= len(data_list):
-            break
+    # Keep the main thread alive until all data packages are done
+    for _ in data_list:
+        done_semaphore.acquire()
 
     pipeline.unregister_instance(pip_ex_id)
 
@@ -1,25 +1,46 @@
+import os
+from pathlib import Path
+from typing import Any, List
+
 from setuptools import setup, find_packages
 
+HERE = Path(__file__).parent
+
 # Read the requirements from the requirements.txt file
-with open('requirements.txt') as f:
-    requirements = f.read().splitlines()
+def read_requirements() -> List[str]:
+    return (HERE / 'requirements.txt').read_text().splitlines()
+
+def read_readme() -> str:
+    return (HERE / 'README.md').read_text()
+
+# Optional: STREAM_PIPELINE_ENABLE_SPEEDUPS=1 pip install . compiles the modules on the hot path with Cython.
+# The .py files stay the source, without the flag (or without Cython) the package is pure python.
+SPEEDUP_MODULES = ['stream_pipeline/data_package.py']
+
+def speedup_extensions() -> List[Any]:
+    if not os.environ.get('STREAM_PIPELINE_ENABLE_SPEEDUPS'):
+        return []
+    from Cython.Build import cythonize
+    return cythonize(SPEEDUP_MODULES, compiler_directives={'language_level': '3'})
 
-setup(
-    name='stream_pipeline',
-    version='0.1',
-    packages=find_packages(),
-    package_data={'stream_pipeline': ['py.typed']},
-    description='Scalable microservice pipeline for data stream processing',
-    long_description=open('README.md').read(),
-    long_description_content_type='text/markdown',
-    url='https://github.com/bigbluebutton-bot/stream_pipeline',
-    author='Julian Kropp',
-    author_email='62835694+JulianKropp@users.noreply.github.com>',
-    classifiers=[
-        'Programming Language :: Python :: 3',
-        'License :: OSI Approved :: MIT License',
-        'Operating System :: OS Independent',
-    ],
-    python_requires='>=3.6',
-    install_requires=requirements,
-)
+if __name__ == '__main__':
+    setup(
+        name='stream_pipeline',
+        version='0.1',
+        packages=find_packages(),
+        package_data={'stream_pipeline': ['py.typed']},
+        description='Scalable microservice pipeline for data stream processing',
+        long_description=read_readme(),
+        long_description_content_type='text/markdown',
+        url='https://github.com/bigbluebutton-bot/stream_pipeline',
+        author='Julian Kropp',
+        author_email='62835694+JulianKropp@users.noreply.github.com>',
+        classifiers=[
+            'Programming Language :: Python :: 3',
+            'License :: OSI Approved :: MIT License',
+            'Operating System :: OS Independent',
+        ],
+        python_requires='>=3.6',
+        install_requires=read_requirements(),
+        ext_modules=speedup_extensions(),
+    )
@@ -1,7 +1,12 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
+import itertools
 import pickle
-from typing import Generic, List, Optional, TypeVar, Union
+import threading
+from typing import Any, Callable, Dict, Generic, List, NamedTuple, Optional, Tuple, TypeVar, Union
 import uuid
+import warnings
+
+from google.protobuf.internal import api_implementation
 
 from . import data_pb2
 from .thread_safe_class import ThreadSafeClass
@@ -9,6 +14,15 @@ from .logger import Error, exception_to_error
 
 from enum import Enum
 
+# to_grpc/set_from_grpc set every field one by one, which is many times slower with the pure python protobuf runtime
+if api_implementation.Type() == "python":
+    warnings.warn(
+        "protobuf is using the pure python implementation, converting data packages to gRPC will be slow. "
+        "Install a protobuf wheel with the upb backend or unset PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION=python.",
+        RuntimeWarning,
+    )
+
+# Values are the same as data_pb2.Status, so the gRPC conversion uses them directly
 class Status(Enum):
     UNSPECIFIED = 0
     RUNNING = 1
@@ -20,6 +34,104 @@ class Status(Enum):
     OUTDATED = 7
     WAITING_OUTPUT = 8
 
+# Ids are a random per process prefix and a counter. The prefix keeps them unique across processes,
+# which matters because set_from_grpc matches the objects of both sides of a gRPC call by id.
+_ID_PREFIX = uuid.uuid4().hex[:12]
+_id_counter = itertools.count()
+
+def _new_id(kind: str) -> str:
+    return f"{kind}-{_ID_PREFIX}-{next(_id_counter)}"
+
+class DataCodec(NamedTuple):
+    """
+    Serializes DataPackage.data of one type for gRPC.
+    """
+    codec_id: int
+    encode: Callable[[Any], bytes]
+    decode: Callable[[bytes], Any]
+
+# Serialized data is either a pickle (starts with the protocol byte 0x80) or _CODEC_MARKER, the codec id and the encoded data.
+_CODEC_MARKER = 0
+# Highest pickle protocol every supported python version (setup.py python_requires) can read. 5 needs python 3.8.
+_PICKLE_PROTOCOL = 4
+_codecs_by_type: Dict[type, DataCodec] = {}
+_codecs_by_id: Dict[int, DataCodec] = {}
+
+def register_data_codec(codec_id: int, data_type: type, encode: Callable[[Any], bytes], decode: Callable[[bytes], Any]) -> None:
+    """
+    Registers a codec that is used instead of pickle when DataPackage.data is exactly of data_type.
+    Both sides of the gRPC connection must register the same codecs.
+    Args:
+        codec_id (int): 1-255, ids up to 15 are reserved for stream_pipeline
+        data_type (type): type of the data, subclasses are still pickled
+        encode (Callable[[Any], bytes]): converts the data to bytes
+        decode (Callable[[bytes], Any]): converts the bytes back to the data
+    """
+    if not 0 < codec_id < 256:
+        raise ValueError("codec_id must be between 1 and 255")
+    existing = _codecs_by_id.get(codec_id)
+    if existing is not None and _codecs_by_type.get(data_type) is not existing:
+        raise ValueError(f"codec_id {codec_id} is already registered for another type")
+    codec = DataCodec(codec_id, encode, decode)
+    _codecs_by_type[data_type] = codec
+    _codecs_by_id[codec_id] = codec
+
+def _encode_data(data: Any) -> bytes:
+    codec = _codecs_by_type.get(type(data))
+    if codec is None:
+        return pickle.dumps(data, protocol=_PICKLE_PROTOCOL)
+    return bytes((_CODEC_MARKER, codec.codec_id)) + codec.encode(data)
+
+def _decode_data(data: bytes) -> Any:
+    if not data or data[0] != _CODEC_MARKER:
+        return pickle.loads(data)
+    codec = _codecs_by_id.get(data[1])
+    if codec is None:
+        raise ValueError(f"No codec registered for codec_id {data[1]}")
+    return codec.decode(data[2:])
+
+# Raw audio and other byte streams don't need pickle
+register_data_codec(1, bytes, bytes, bytes)
+
+class _EncodedData(NamedTuple):
+    """
+    DataPackage.data as received over gRPC. It is only decoded when the data is read,
+    and sent on unchanged if nobody read it.
+    """
+    encoded: bytes
+
+# Decoding holds the GIL anyway, so one lock for all data packages costs little
+_decode_lock = threading.Lock()
+
+def _is_merged(item: Any, grpc_item: Any, children: List[Any], grpc_children: Any) -> bool:
+    """
+    Returns True if item already holds the finished state of grpc_item. Finished objects (end_time set) don't change anymore,
+    so comparing id, status, end time and number of children is enough to skip them together with all their children.
+    """
+    return (bool(grpc_item.end_time) and grpc_item.end_time == item.end_time and grpc_item.id == item.id
+            and grpc_item.status == item.status.value and len(grpc_children) == len(children))
+
+def _merge_from_grpc(items: List[Any], grpc_items: Any, new_item: Callable[[], Any]) -> None:
+    """
+    Updates the items with the id of a gRPC item and appends new items for the others.
+    Both lists are usually in the same order, so the item at the same position is tried first
+    and the id index is only built if that doesn't match.
+    """
+    index: Optional[Dict[str, Any]] = None
+    count = len(items)
+    for position, grpc_item in enumerate(grpc_items):
+        item = items[position] if position < count else None
+        if item is None or item.id != grpc_item.id:
+            if index is None:
+                index = {existing.id: existing for existing in items[:count]}
+            item = index.get(grpc_item.id)
+        if item is None:
+            item = new_item()
+            item.set_from_grpc(grpc_item)
+            items.append(item)
+        else:
+            item.set_from_grpc(grpc_item)
+
 @dataclass
 class DataPackageModule(ThreadSafeClass):
     """
@@ -38,7 +150,7 @@ class DataPackageModule(ThreadSafeClass):
         message (str):                          Informational message.
         error (Union[Exception, Error, None]):  Error encountered during processing, if any.
     """
-    _id: str = field(default_factory=lambda: "DP-M-" + str(uuid.uuid4()))
+    _id: str = field(default_factory=lambda: _new_id("DP-M"))
     _module_id: str = ""
     _module_name: str = ""
     _status: Status = Status.UNSPECIFIED
@@ -146,60 +258,63 @@ class DataPackageModule(ThreadSafeClass):
         """
         Updates the current instance with data from a gRPC module.
         """
-        temp_immutable_attributes = self._ThreadSafeClass__immutable_attributes
-        self._ThreadSafeClass__immutable_attributes = []
-
-        self.id = grpc_module.id
-        self.module_id = grpc_module.module_id
-        self.module_name = grpc_module.module_name
-        self.status = Status[data_pb2.Status.Name(grpc_module.status)]
-        self.start_time = grpc_module.start_time
-        self.end_time = grpc_module.end_time
-        self.waiting_time = grpc_module.waiting_time
-        self.total_time = grpc_module.total_time
-
-        existing_sub_modules = {sub_module.id: sub_module for sub_module in self.sub_modules}
-        for module in grpc_module.sub_modules:
-            if module:
-                if module.id in existing_sub_modules:
-                    existing_sub_modules[module.id].set_from_grpc(module)
-                else:
-                    new_sub_module = DataPackageModule()
-                    new_sub_module.set_from_grpc(module)
-                    self.sub_modules.append(new_sub_module)
-
-        self.message = grpc_module.message
-        if grpc_module.error and grpc_module.error.ListFields():
+        if _is_merged(self, grpc_module, self.sub_modules, grpc_module.sub_modules):
+            return
+
+        self._set_attributes({
+            'id': grpc_module.id,
+            'module_id': grpc_module.module_id,
+            'module_name': grpc_module.module_name,
+            'status': Status(grpc_module.status),
+            'start_time': grpc_module.start_time,
+            'end_time': grpc_module.end_time,
+            'waiting_time': grpc_module.waiting_time,
+            'total_time': grpc_module.total_time,
+            'message': grpc_module.message,
+        })
+
+        _merge_from_grpc(self.sub_modules, grpc_module.sub_modules, DataPackageModule)
+
+        if grpc_module.HasField('error'):
             if self.error is None:
                 self.error = Error()
             self.error.set_from_grpc(grpc_module.error)
         else:
             self.error = None
-        
-        self._ThreadSafeClass__immutable_attributes = temp_immutable_attributes
 
     def to_grpc(self) -> data_pb2.DataPackageModule:
         """
         Converts the current instance to a gRPC module.
         """
         grpc_module = data_pb2.DataPackageModule()
+        self._fill_grpc(grpc_module)
+        return grpc_module
+
+    def _fill_grpc(self, grpc_module: data_pb2.DataPackageModule) -> None:
+        """
+        Writes the current instance into an empty gRPC module. Sub modules are written into the repeated field in place.
+        """
         grpc_module.id = self.id
         grpc_module.module_id = self.module_id
         grpc_module.module_name = self.module_name
-        grpc_module.status = data_pb2.Status.Value(self.status.name)
+        grpc_module.status = self.status.value # type: ignore
         grpc_module.start_time = self.start_time
         grpc_module.end_time = self.end_time
         grpc_module.waiting_time = self.waiting_time
         grpc_module.total_time = self.total_time
-        grpc_module.sub_modules.extend([module.to_grpc() for module in self.sub_modules])
+        add_sub_module = grpc_module.sub_modules.add
+        for module in self.sub_modules:
+            module._fill_grpc(add_sub_module())
         grpc_module.message = self.message
-        if isinstance(self.error, Exception):
-            self.error = exception_to_error(self.error)
-        if self.error:
-            grpc_module.error.CopyFrom(self.error.to_grpc())
-        else:
-            grpc_module.error.Clear()
-        return grpc_module
+        # The error setter already converts exceptions, so error is almost always None or an Error.
+        # Read it once and only convert (and store) if something else slipped in.
+        error = self.error
+        if error is None:
+            return
+        if type(error) is not Error:
+            error = exception_to_error(error)
+            self.error = error
+        error._fill_grpc(grpc_module.error)
 
 
 @dataclass
@@ -217,7 +332,7 @@ class DataPackagePhase(ThreadSafeClass):
         total_time (float):                 Total time spent on the phase.
         modules (List[DataPackageModule]):  List of modules that processed the data package.
     """
-    _id: str = field(default_factory=lambda: "DP-PP-" + str(uuid.uuid4()))
+    _id: str = field(default_factory=lambda: _new_id("DP-PP"))
     _phase_id: str = ""
     _phase_name: str = ""
     _status: Status = Status.UNSPECIFIED
@@ -297,43 +412,43 @@ class DataPackagePhase(ThreadSafeClass):
         """
         Updates the current instance with data from a gRPC phase.
         """
-        temp_immutable_attributes = self._ThreadSafeClass__immutable_attributes
-        self._ThreadSafeClass__immutable_attributes = []
-
-        self.id = grpc_phase.id
-        self.phase_id = grpc_phase.phase_id
-        self.phase_name = grpc_phase.phase_name
-        self.status = Status[data_pb2.Status.Name(grpc_phase.status)]
-        self.start_time = grpc_phase.start_time
-        self.end_time = grpc_phase.end_time
-        self.total_time = grpc_phase.total_time
-
-        existing_modules = {module.id: module for module in self.modules}
-        for module in grpc_phase.modules:
-            if module:
-                if module.id in existing_modules:
-                    existing_modules[module.id].set_from_grpc(module)
-                else:
-                    new_module = DataPackageModule()
-                    new_module.set_from_grpc(module)
-                    self.modules.append(new_module)
+        if _is_merged(self, grpc_phase, self.modules, grpc_phase.modules):
+            return
 
-        self._ThreadSafeClass__immutable_attributes = temp_immutable_attributes
+        self._set_attributes({
+            'id': grpc_phase.id,
+            'phase_id': grpc_phase.phase_id,
+            'phase_name': grpc_phase.phase_name,
+            'status': Status(grpc_phase.status),
+            'start_time': grpc_phase.start_time,
+            'end_time': grpc_phase.end_time,
+            'total_time': grpc_phase.total_time,
+        })
+
+        _merge_from_grpc(self.modules, grpc_phase.modules, DataPackageModule)
 
     def to_grpc(self) -> data_pb2.DataPackagePhase:
         """
         Converts the current instance to a gRPC phase.
         """
         grpc_phase = data_pb2.DataPackagePhase()
+        self._fill_grpc(grpc_phase)
+        return grpc_phase
+
+    def _fill_grpc(self, grpc_phase: data_pb2.DataPackagePhase) -> None:
+        """
+        Writes the current instance into an empty gRPC phase.
+        """
         grpc_phase.id = self.id
         grpc_phase.phase_id = self.phase_id
         grpc_phase.phase_name = self.phase_name
-        grpc_phase.status = data_pb2.Status.Value(self.status.name)
+        grpc_phase.status = self.status.value # type: ignore
         grpc_phase.start_time = self.start_time
         grpc_phase.end_time = self.end_time
         grpc_phase.total_time = self.total_time
-        grpc_phase.modules.extend([module.to_grpc() for module in self.modules])
-        return grpc_phase
+        add_module = grpc_phase.modules.add
+        for module in self.modules:
+            module._fill_grpc(add_module())
 
 
 @dataclass
@@ -356,7 +471,7 @@ class DataPackageController(ThreadSafeClass):
         total_time (float):                 Total time spent on phase execution.
         phases (List[DataPackagePhase]):    List of phases that processed the data package.
     """
-    _id: str = field(default_factory=lambda: "DP-C-" + str(uuid.uuid4()))
+    _id: str = field(default_factory=lambda: _new_id("DP-C"))
     _controller_id: str = ""
     _controller_name: str = ""
     _mode: str = "NOT_PARALLEL"
@@ -480,53 +595,53 @@ class DataPackageController(ThreadSafeClass):
         """
         Updates the current instance with data from a gRPC phase execution.
         """
-        temp_immutable_attributes = self._ThreadSafeClass__immutable_attributes
-        self._ThreadSafeClass__immutable_attributes = []
-
-        self.id = grpc_controller.id
-        self.controller_id = grpc_controller.controller_id
-        self.controller_name = grpc_controller.controller_name
-        self.mode = grpc_controller.mode
-        self.workers = grpc_controller.workers
-        self.sequence_number = grpc_controller.sequence_number
-        self.status = Status[data_pb2.Status.Name(grpc_controller.status)]
-        self.start_time = grpc_controller.start_time
-        self.end_time = grpc_controller.end_time
-        self.input_waiting_time = grpc_controller.input_waiting_time
-        self.output_waiting_time = grpc_controller.output_waiting_time
-        self.total_time = grpc_controller.total_time
-
-        existing_phases = {phase.id: phase for phase in self.phases}
-        for phase in grpc_controller.phases:
-            if phase:
-                if phase.id in existing_phases:
-                    existing_phases[phase.id].set_from_grpc(phase)
-                else:
-                    new_phase = DataPackagePhase()
-                    new_phase.set_from_grpc(phase)
-                    self.phases.append(new_phase)
-
-        self._ThreadSafeClass__immutable_attributes = temp_immutable_attributes
+        if _is_merged(self, grpc_controller, self.phases, grpc_controller.phases):
+            return
+
+        self._set_attributes({
+            'id': grpc_controller.id,
+            'controller_id': grpc_controller.controller_id,
+            'controller_name': grpc_controller.controller_name,
+            'mode': grpc_controller.mode,
+            'workers': grpc_controller.workers,
+            'sequence_number': grpc_controller.sequence_number,
+            'status': Status(grpc_controller.status),
+            'start_time': grpc_controller.start_time,
+            'end_time': grpc_controller.end_time,
+            'input_waiting_time': grpc_controller.input_waiting_time,
+            'output_waiting_time': grpc_controller.output_waiting_time,
+            'total_time': grpc_controller.total_time,
+        })
+
+        _merge_from_grpc(self.phases, grpc_controller.phases, DataPackagePhase)
 
     def to_grpc(self) -> data_pb2.DataPackageController:
         """
         Converts the current instance to a gRPC phase execution.
         """
         grpc_controller = data_pb2.DataPackageController()
+        self._fill_grpc(grpc_controller)
+        return grpc_controller
+
+    def _fill_grpc(self, grpc_controller: data_pb2.DataPackageController) -> None:
+        """
+        Writes the current instance into an empty gRPC phase execution.
+        """
         grpc_controller.id = self.id
         grpc_controller.controller_id = self.controller_id
         grpc_controller.controller_name = self.controller_name
         grpc_controller.mode = self.mode
         grpc_controller.workers = self.workers
         grpc_controller.sequence_number = self.sequence_number
-        grpc_controller.status = data_pb2.Status.Value(self.status.name)
+        grpc_controller.status = self.status.value # type: ignore
         grpc_controller.start_time = self.start_time
         grpc_controller.end_time = self.end_time
         grpc_controller.input_waiting_time = self.input_waiting_time
         grpc_controller.output_waiting_time = self.output_waiting_time
         grpc_controller.total_time = self.total_time
-        grpc_controller.phases.extend([phase.to_grpc() for phase in self.phases])
-        return grpc_controller
+        add_phase = grpc_controller.phases.add
+        for phase in self.phases:
+            phase._fill_grpc(add_phase())
 
 T = TypeVar('T')
 
@@ -546,9 +661,9 @@ class DataPackage(Generic[T], ThreadSafeClass):
         start_time (float):                             Timestamp when the data package started processing.
         end_time (float):                               Timestamp when the data package finished processing.
         total_time (float):                             Total time spent processing the data package.
-        errors (List[Optional[Error]]):                 List of errors that occurred during processing.
+        errors (List[Error]):                           List of errors that occurred during processing.
     """
-    _id: str = field(default_factory=lambda: "DP-" + str(uuid.uuid4()), init=False)
+    _id: str = field(default_factory=lambda: _new_id("DP"), init=False)
     _pipeline_id: str = ""
     _pipeline_name: str = ""
     _pipeline_instance_id: str = ""
@@ -558,7 +673,7 @@ class DataPackage(Generic[T], ThreadSafeClass):
     _start_time: float = 0.0
     _end_time: float = 0.0
     _total_time: float = 0.0
-    _errors: List[Optional[Error]] = field(default_factory=list)
+    _errors: List[Error] = field(default_factory=list)
 
     # Immutable attributes
     _ThreadSafeClass__immutable_attributes: List[str] = field(default_factory=lambda: ['id'])
@@ -605,7 +720,7 @@ class DataPackage(Generic[T], ThreadSafeClass):
     
     @property
     def data(self) -> Optional[T]:
-        return self._get_attribute('data')
+        return self._ensure_decoded()
     
     @data.setter
     def data(self, value: Optional[T]) -> None:
@@ -644,82 +759,104 @@ class DataPackage(Generic[T], ThreadSafeClass):
         self._set_attribute('total_time', value)
     
     @property
-    def errors(self) -> List[Optional[Error]]:
+    def errors(self) -> List[Error]:
         return self._get_attribute('errors')
     
     @errors.setter
     def errors(self, value: List[Union[Exception, Error, None]]) -> None:
-        new_list = []
-        for error in value:
-            if isinstance(error, Exception):
-                error = exception_to_error(error)
-            new_list.append(error)
-        self._set_attribute('errors', new_list)
+        # None entries are dropped, so the list only ever holds errors
+        self._set_attribute('errors', [exception_to_error(error) for error in value if error is not None])
+
+    def _ensure_decoded(self) -> Optional[T]:
+        """
+        Decodes data received over gRPC (see set_from_grpc) if that didn't happen yet and returns it.
+        Everything that reads _data directly instead of through the data property has to call this first.
+        """
+        data = self._get_attribute('data')
+        if type(data) is _EncodedData:
+            with _decode_lock:
+                data = self._get_attribute('data')
+                if type(data) is _EncodedData:
+                    data = _decode_data(data.encoded)
+                    # Reading is allowed after a timeout, so this skips the check of _set_attribute
+                    self.__dict__['_data'] = data
+        return data
+
+    def to_dict(self, truncate_long_data: int = 0) -> Dict[str, Any]:
+        self._ensure_decoded()
+        return super().to_dict(truncate_long_data)
+
+    # Written out instead of generated by @dataclass, because the generated methods would see the encoded data
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        assert isinstance(other, DataPackage)
+        self._ensure_decoded()
+        other._ensure_decoded()
+        return tuple(getattr(self, f.name) for f in fields(self) if f.compare) == tuple(getattr(other, f.name) for f in fields(other) if f.compare)
+
+    def __repr__(self) -> str:
+        self._ensure_decoded()
+        values = ", ".join(f"{f.name}={getattr(self, f.name)!r}" for f in fields(self) if f.repr)
+        return f"{self.__class__.__qualname__}({values})"
 
     def set_from_grpc(self, grpc_package: data_pb2.DataPackage) -> None:
         """
         Updates the current instance with data from a gRPC data package.
         """
-        temp_immutable_attributes = self._ThreadSafeClass__immutable_attributes
-        self._ThreadSafeClass__immutable_attributes = []
-
-        self.id = grpc_package.id
-        self.pipeline_id = grpc_package.pipeline_id
-        self.pipeline_name = grpc_package.pipeline_name
-        self.pipeline_instance_id = grpc_package.pipeline_instance_id
-
-        existing_controllers = {controller.id: controller for controller in self.controllers}
-        for controller in grpc_package.controllers:
-            if controller:
-                if controller.id in existing_controllers:
-                    existing_controllers[controller.id].set_from_grpc(controller)
-                else:
-                    new_controller = DataPackageController()
-                    new_controller.set_from_grpc(controller)
-                    self.controllers.append(new_controller)
-
-        self.data = pickle.loads(grpc_package.data)
-        self.status = Status[data_pb2.Status.Name(grpc_package.status)]
-        self.start_time = grpc_package.start_time
-        self.end_time = grpc_package.end_time
-        self.total_time = grpc_package.total_time
-
-        existing_errors = {error.id: error for error in self.errors if error}
-        for error in grpc_package.errors:
-            if error:
-                if error.id in existing_errors:
-                    existing_errors[error.id].set_from_grpc(error)
-                else:
-                    new_error = Error()
-                    new_error.set_from_grpc(error)
-                    self.errors.append(new_error)
-
-        self._ThreadSafeClass__immutable_attributes = temp_immutable_attributes
+        self._set_attributes({
+            'id': grpc_package.id,
+            'pipeline_id': grpc_package.pipeline_id,
+            'pipeline_name': grpc_package.pipeline_name,
+            'pipeline_instance_id': grpc_package.pipeline_instance_id,
+            'data': _EncodedData(grpc_package.data),
+            'status': Status(grpc_package.status),
+            'start_time': grpc_package.start_time,
+            'end_time': grpc_package.end_time,
+            'total_time': grpc_package.total_time,
+        })
+
+        _merge_from_grpc(self.controllers, grpc_package.controllers, DataPackageController)
+        _merge_from_grpc(self.errors, grpc_package.errors, Error)
 
     def to_grpc(self) -> data_pb2.DataPackage:
         """
         Converts the current instance to a gRPC data package.
         """
         grpc_package = data_pb2.DataPackage()
+        self._fill_grpc(grpc_package)
+        return grpc_package
+
+    def _fill_grpc(self, grpc_package: data_pb2.DataPackage) -> None:
+        """
+        Writes the current instance into an empty gRPC data package, e.g. the data_package field of a request.
+        """
         grpc_package.id = self.id
         grpc_package.pipeline_name = self.pipeline_name
         grpc_package.pipeline_id = self.pipeline_id
         grpc_package.pipeline_instance_id = self.pipeline_instance_id
-        grpc_package.controllers.extend([phase.to_grpc() for phase in self.controllers])
-        try:
-            grpc_package.data = pickle.dumps(self.data)
-        except Exception as e:
-            if isinstance(e, AttributeError):
-                raise RuntimeError(
-                            "Failed to serialize data. This likely occurred because the Data class is not defined in its own file. "
-                            "When the Data class is defined within the main script, pickle cannot import it properly, leading to a circular import issue. "
-                            "To resolve this, define the Data class in a separate file and import it into your main script."
-                        ) from e           
-            else:
-                raise e
-        grpc_package.status = data_pb2.Status.Value(self.status.name)
+        add_controller = grpc_package.controllers.add
+        for controller in self.controllers:
+            controller._fill_grpc(add_controller())
+        data = self._get_attribute('data')
+        if type(data) is _EncodedData:
+            grpc_package.data = data.encoded
+        else:
+            try:
+                grpc_package.data = _encode_data(data)
+            except Exception as e:
+                if isinstance(e, AttributeError):
+                    raise RuntimeError(
+                                "Failed to serialize data. This likely occurred because the Data class is not defined in its own file. "
+                                "When the Data class is defined within the main script, pickle cannot import it properly, leading to a circular import issue. "
+                                "To resolve this, define the Data class in a separate file and import it into your main script."
+                            ) from e           
+                else:
+                    raise e
+        grpc_package.status = self.status.value # type: ignore
         grpc_package.start_time = self.start_time
         grpc_package.end_time = self.end_time
         grpc_package.total_time = self.total_time
-        grpc_package.errors.extend([error.to_grpc() for error in self.errors if error])
-        return grpc_package
\ No newline at end of file
+        add_error = grpc_package.errors.add
+        for error in self.errors:
+            error._fill_grpc(add_error())
\ No newline at end of file
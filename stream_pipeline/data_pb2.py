@@ -14,7 +14,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\ndata.proto\x12\x04\x64\x61ta\"\xbe\x04\n\x05\x45rror\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04type\x18\x02 \x01(\t\x12\x0f\n\x07message\x18\x03 \x01(\t\x12\x11\n\ttraceback\x18\x04 \x03(\t\x12\x0e\n\x06thread\x18\x05 \x01(\t\x12\x15\n\rstart_context\x18\x06 \x01(\t\x12\x11\n\tthread_id\x18\x07 \x01(\x03\x12\x11\n\tis_daemon\x18\x08 \x01(\x08\x12.\n\nlocal_vars\x18\t \x03(\x0b\x32\x1a.data.Error.LocalVarsEntry\x12\x30\n\x0bglobal_vars\x18\n \x03(\x0b\x32\x1b.data.Error.GlobalVarsEntry\x12:\n\x10\x65nvironment_vars\x18\x0b \x03(\x0b\x32 .data.Error.EnvironmentVarsEntry\x12\x38\n\x0fmodule_versions\x18\x0c \x03(\x0b\x32\x1f.data.Error.ModuleVersionsEntry\x1a\x30\n\x0eLocalVarsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x1a\x31\n\x0fGlobalVarsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x1a\x36\n\x14\x45nvironmentVarsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x1a\x35\n\x13ModuleVersionsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"\x90\x02\n\x11\x44\x61taPackageModule\x12\n\n\x02id\x18\x01 \x01(\t\x12\x11\n\tmodule_id\x18\x02 \x01(\t\x12\x13\n\x0bmodule_name\x18\x03 \x01(\t\x12\x1c\n\x06status\x18\x04 \x01(\x0e\x32\x0c.data.Status\x12\x12\n\nstart_time\x18\x05 \x01(\x01\x12\x10\n\x08\x65nd_time\x18\x06 \x01(\x01\x12\x14\n\x0cwaiting_time\x18\x07 \x01(\x01\x12\x12\n\ntotal_time\x18\x08 \x01(\x01\x12,\n\x0bsub_modules\x18\t \x03(\x0b\x32\x17.data.DataPackageModule\x12\x0f\n\x07message\x18\n \x01(\t\x12\x1a\n\x05\x65rror\x18\x0b \x01(\x0b\x32\x0b.data.Error\"\xc6\x01\n\x10\x44\x61taPackagePhase\x12\n\n\x02id\x18\x01 \x01(\t\x12\x10\n\x08phase_id\x18\x02 \x01(\t\x12\x12\n\nphase_name\x18\x03 \x01(\t\x12\x1c\n\x06status\x18\x04 \x01(\x0e\x32\x0c.data.Status\x12\x12\n\nstart_time\x18\x05 \x01(\x01\x12\x10\n\x08\x65nd_time\x18\x06 \x01(\x01\x12\x12\n\ntotal_time\x18\x07 \x01(\x01\x12(\n\x07modules\x18\x08 \x03(\x0b\x32\x17.data.DataPackageModule\"\xc4\x02\n\x15\x44\x61taPackageController\x12\n\n\x02id\x18\x01 \x01(\t\x12\x15\n\rcontroller_id\x18\x02 \x01(\t\x12\x17\n\x0f\x63ontroller_name\x18\x03 \x01(\t\x12\x0c\n\x04mode\x18\x04 \x01(\t\x12\x0f\n\x07workers\x18\x05 \x01(\x05\x12\x17\n\x0fsequence_number\x18\x06 \x01(\x05\x12\x1c\n\x06status\x18\x07 \x01(\x0e\x32\x0c.data.Status\x12\x12\n\nstart_time\x18\x08 \x01(\x01\x12\x10\n\x08\x65nd_time\x18\t \x01(\x01\x12\x1a\n\x12input_waiting_time\x18\n \x01(\x01\x12\x1b\n\x13output_waiting_time\x18\x0b \x01(\x01\x12\x12\n\ntotal_time\x18\x0c \x01(\x01\x12&\n\x06phases\x18\x0e \x03(\x0b\x32\x16.data.DataPackagePhase\"\x98\x02\n\x0b\x44\x61taPackage\x12\n\n\x02id\x18\x01 \x01(\t\x12\x13\n\x0bpipeline_id\x18\x02 \x01(\t\x12\x15\n\rpipeline_name\x18\x03 \x01(\t\x12\x1c\n\x14pipeline_instance_id\x18\x04 \x01(\t\x12\x30\n\x0b\x63ontrollers\x18\x05 \x03(\x0b\x32\x1b.data.DataPackageController\x12\x0c\n\x04\x64\x61ta\x18\x06 \x01(\x0c\x12\x1c\n\x06status\x18\x07 \x01(\x0e\x32\x0c.data.Status\x12\x12\n\nstart_time\x18\x08 \x01(\x01\x12\x10\n\x08\x65nd_time\x18\t \x01(\x01\x12\x12\n\ntotal_time\x18\n \x01(\x01\x12\x1b\n\x06\x65rrors\x18\x0b \x03(\x0b\x32\x0b.data.Error\"\x97\x01\n\tRequestDP\x12\'\n\x0c\x64\x61ta_package\x18\x01 \x01(\x0b\x32\x11.data.DataPackage\x12\"\n\x1a\x64\x61ta_package_controller_id\x18\x02 \x01(\t\x12\x1d\n\x15\x64\x61ta_package_phase_id\x18\x03 \x01(\t\x12\x1e\n\x16\x64\x61ta_package_module_id\x18\x04 \x01(\t\"w\n\x10ReturnDPandError\x12\'\n\x0c\x64\x61ta_package\x18\x01 \x01(\x0b\x32\x11.data.DataPackage\x12\x1e\n\x16\x64\x61ta_package_module_id\x18\x02 \x01(\t\x12\x1a\n\x05\x65rror\x18\x03 \x01(\x0b\x32\x0b.data.Error*\x85\x01\n\x06Status\x12\x0f\n\x0bUNSPECIFIED\x10\x00\x12\x0b\n\x07RUNNING\x10\x01\x12\x0b\n\x07WAITING\x10\x02\x12\x0b\n\x07SUCCESS\x10\x03\x12\x08\n\x04\x45XIT\x10\x04\x12\t\n\x05\x45RROR\x10\x05\x12\x0c\n\x08OVERFLOW\x10\x06\x12\x0c\n\x08OUTDATED\x10\x07\x12\x12\n\x0eWAITING_OUTPUT\x10\x08\x32?\n\rModuleService\x12.\n\x03run\x12\x0f.data.RequestDP\x1a\x16.data.ReturnDPandErrorb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\ndata.proto\x12\x04\x64\x61ta\"\xbe\x04\n\x05\x45rror\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04type\x18\x02 \x01(\t\x12\x0f\n\x07message\x18\x03 \x01(\t\x12\x11\n\ttraceback\x18\x04 \x03(\t\x12\x0e\n\x06thread\x18\x05 \x01(\t\x12\x15\n\rstart_context\x18\x06 \x01(\t\x12\x11\n\tthread_id\x18\x07 \x01(\x03\x12\x11\n\tis_daemon\x18\x08 \x01(\x08\x12.\n\nlocal_vars\x18\t \x03(\x0b\x32\x1a.data.Error.LocalVarsEntry\x12\x30\n\x0bglobal_vars\x18\n \x03(\x0b\x32\x1b.data.Error.GlobalVarsEntry\x12:\n\x10\x65nvironment_vars\x18\x0b \x03(\x0b\x32 .data.Error.EnvironmentVarsEntry\x12\x38\n\x0fmodule_versions\x18\x0c \x03(\x0b\x32\x1f.data.Error.ModuleVersionsEntry\x1a\x30\n\x0eLocalVarsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x1a\x31\n\x0fGlobalVarsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x1a\x36\n\x14\x45nvironmentVarsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x1a\x35\n\x13ModuleVersionsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"\x90\x02\n\x11\x44\x61taPackageModule\x12\n\n\x02id\x18\x01 \x01(\t\x12\x11\n\tmodule_id\x18\x02 \x01(\t\x12\x13\n\x0bmodule_name\x18\x03 \x01(\t\x12\x1c\n\x06status\x18\x04 \x01(\x0e\x32\x0c.data.Status\x12\x12\n\nstart_time\x18\x05 \x01(\x01\x12\x10\n\x08\x65nd_time\x18\x06 \x01(\x01\x12\x14\n\x0cwaiting_time\x18\x07 \x01(\x01\x12\x12\n\ntotal_time\x18\x08 \x01(\x01\x12,\n\x0bsub_modules\x18\t \x03(\x0b\x32\x17.data.DataPackageModule\x12\x0f\n\x07message\x18\n \x01(\t\x12\x1a\n\x05\x65rror\x18\x0b \x01(\x0b\x32\x0b.data.Error\"\xc6\x01\n\x10\x44\x61taPackagePhase\x12\n\n\x02id\x18\x01 \x01(\t\x12\x10\n\x08phase_id\x18\x02 \x01(\t\x12\x12\n\nphase_name\x18\x03 \x01(\t\x12\x1c\n\x06status\x18\x04 \x01(\x0e\x32\x0c.data.Status\x12\x12\n\nstart_time\x18\x05 \x01(\x01\x12\x10\n\x08\x65nd_time\x18\x06 \x01(\x01\x12\x12\n\ntotal_time\x18\x07 \x01(\x01\x12(\n\x07modules\x18\x08 \x03(\x0b\x32\x17.data.DataPackageModule\"\xc4\x02\n\x15\x44\x61taPackageController\x12\n\n\x02id\x18\x01 \x01(\t\x12\x15\n\rcontroller_id\x18\x02 \x01(\t\x12\x17\n\x0f\x63ontroller_name\x18\x03 \x01(\t\x12\x0c\n\x04mode\x18\x04 \x01(\t\x12\x0f\n\x07workers\x18\x05 \x01(\x05\x12\x17\n\x0fsequence_number\x18\x06 \x01(\x05\x12\x1c\n\x06status\x18\x07 \x01(\x0e\x32\x0c.data.Status\x12\x12\n\nstart_time\x18\x08 \x01(\x01\x12\x10\n\x08\x65nd_time\x18\t \x01(\x01\x12\x1a\n\x12input_waiting_time\x18\n \x01(\x01\x12\x1b\n\x13output_waiting_time\x18\x0b \x01(\x01\x12\x12\n\ntotal_time\x18\x0c \x01(\x01\x12&\n\x06phases\x18\x0e \x03(\x0b\x32\x16.data.DataPackagePhase\"\x98\x02\n\x0b\x44\x61taPackage\x12\n\n\x02id\x18\x01 \x01(\t\x12\x13\n\x0bpipeline_id\x18\x02 \x01(\t\x12\x15\n\rpipeline_name\x18\x03 \x01(\t\x12\x1c\n\x14pipeline_instance_id\x18\x04 \x01(\t\x12\x30\n\x0b\x63ontrollers\x18\x05 \x03(\x0b\x32\x1b.data.DataPackageController\x12\x0c\n\x04\x64\x61ta\x18\x06 \x01(\x0c\x12\x1c\n\x06status\x18\x07 \x01(\x0e\x32\x0c.data.Status\x12\x12\n\nstart_time\x18\x08 \x01(\x01\x12\x10\n\x08\x65nd_time\x18\t \x01(\x01\x12\x12\n\ntotal_time\x18\n \x01(\x01\x12\x1b\n\x06\x65rrors\x18\x0b \x03(\x0b\x32\x0b.data.Error\"\xab\x01\n\tRequestDP\x12\'\n\x0c\x64\x61ta_package\x18\x01 \x01(\x0b\x32\x11.data.DataPackage\x12\"\n\x1a\x64\x61ta_package_controller_id\x18\x02 \x01(\t\x12\x1d\n\x15\x64\x61ta_package_phase_id\x18\x03 \x01(\t\x12\x1e\n\x16\x64\x61ta_package_module_id\x18\x04 \x01(\t\x12\x12\n\nrequest_id\x18\x05 \x01(\x04\"\x8b\x01\n\x10ReturnDPandError\x12\'\n\x0c\x64\x61ta_package\x18\x01 \x01(\x0b\x32\x11.data.DataPackage\x12\x1e\n\x16\x64\x61ta_package_module_id\x18\x02 \x01(\t\x12\x1a\n\x05\x65rror\x18\x03 \x01(\x0b\x32\x0b.data.Error\x12\x12\n\nrequest_id\x18\x04 \x01(\x04\"0\n\x0eRequestDPBatch\x12\x1e\n\x05items\x18\x01 \x03(\x0b\x32\x0f.data.RequestDP\">\n\x15ReturnDPandErrorBatch\x12%\n\x05items\x18\x01 \x03(\x0b\x32\x16.data.ReturnDPandError*\x85\x01\n\x06Status\x12\x0f\n\x0bUNSPECIFIED\x10\x00\x12\x0b\n\x07RUNNING\x10\x01\x12\x0b\n\x07WAITING\x10\x02\x12\x0b\n\x07SUCCESS\x10\x03\x12\x08\n\x04\x45XIT\x10\x04\x12\t\n\x05\x45RROR\x10\x05\x12\x0c\n\x08OVERFLOW\x10\x06\x12\x0c\n\x08OUTDATED\x10\x07\x12\x12\n\x0eWAITING_OUTPUT\x10\x08\x32\x84\x01\n\rModuleService\x12.\n\x03run\x12\x0f.data.RequestDP\x1a\x16.data.ReturnDPandError\x12\x43\n\nrun_stream\x12\x14.data.RequestDPBatch\x1a\x1b.data.ReturnDPandErrorBatch(\x01\x30\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -29,8 +29,8 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_ERROR_ENVIRONMENTVARSENTRY']._serialized_options = b'8\001'
   _globals['_ERROR_MODULEVERSIONSENTRY']._loaded_options = None
   _globals['_ERROR_MODULEVERSIONSENTRY']._serialized_options = b'8\001'
-  _globals['_STATUS']._serialized_start=1959
-  _globals['_STATUS']._serialized_end=2092
+  _globals['_STATUS']._serialized_start=2114
+  _globals['_STATUS']._serialized_end=2247
   _globals['_ERROR']._serialized_start=21
   _globals['_ERROR']._serialized_end=595
   _globals['_ERROR_LOCALVARSENTRY']._serialized_start=385
@@ -50,9 +50,13 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_DATAPACKAGE']._serialized_start=1401
   _globals['_DATAPACKAGE']._serialized_end=1681
   _globals['_REQUESTDP']._serialized_start=1684
-  _globals['_REQUESTDP']._serialized_end=1835
-  _globals['_RETURNDPANDERROR']._serialized_start=1837
-  _globals['_RETURNDPANDERROR']._serialized_end=1956
-  _globals['_MODULESERVICE']._serialized_start=2094
-  _globals['_MODULESERVICE']._serialized_end=2157
+  _globals['_REQUESTDP']._serialized_end=1855
+  _globals['_RETURNDPANDERROR']._serialized_start=1858
+  _globals['_RETURNDPANDERROR']._serialized_end=1997
+  _globals['_REQUESTDPBATCH']._serialized_start=1999
+  _globals['_REQUESTDPBATCH']._serialized_end=2047
+  _globals['_RETURNDPANDERRORBATCH']._serialized_start=2049
+  _globals['_RETURNDPANDERRORBATCH']._serialized_end=2111
+  _globals['_MODULESERVICE']._serialized_start=2250
+  _globals['_MODULESERVICE']._serialized_end=2382
 # @@protoc_insertion_point(module_scope)
@@ -370,9 +370,12 @@ class RequestDP(google.protobuf.message.Message):
     DATA_PACKAGE_CONTROLLER_ID_FIELD_NUMBER: builtins.int
     DATA_PACKAGE_PHASE_ID_FIELD_NUMBER: builtins.int
     DATA_PACKAGE_MODULE_ID_FIELD_NUMBER: builtins.int
+    REQUEST_ID_FIELD_NUMBER: builtins.int
     data_package_controller_id: builtins.str
     data_package_phase_id: builtins.str
     data_package_module_id: builtins.str
+    request_id: builtins.int
+    """Used to match responses to requests on run_stream"""
     @property
     def data_package(self) -> global___DataPackage: ...
     def __init__(
@@ -382,9 +385,10 @@ class RequestDP(google.protobuf.message.Message):
         data_package_controller_id: builtins.str = ...,
         data_package_phase_id: builtins.str = ...,
         data_package_module_id: builtins.str = ...,
+        request_id: builtins.int = ...,
     ) -> None: ...
     def HasField(self, field_name: typing.Literal["data_package", b"data_package"]) -> builtins.bool: ...
-    def ClearField(self, field_name: typing.Literal["data_package", b"data_package", "data_package_controller_id", b"data_package_controller_id", "data_package_module_id", b"data_package_module_id", "data_package_phase_id", b"data_package_phase_id"]) -> None: ...
+    def ClearField(self, field_name: typing.Literal["data_package", b"data_package", "data_package_controller_id", b"data_package_controller_id", "data_package_module_id", b"data_package_module_id", "data_package_phase_id", b"data_package_phase_id", "request_id", b"request_id"]) -> None: ...
 
 global___RequestDP = RequestDP
 
@@ -395,7 +399,9 @@ class ReturnDPandError(google.protobuf.message.Message):
     DATA_PACKAGE_FIELD_NUMBER: builtins.int
     DATA_PACKAGE_MODULE_ID_FIELD_NUMBER: builtins.int
     ERROR_FIELD_NUMBER: builtins.int
+    REQUEST_ID_FIELD_NUMBER: builtins.int
     data_package_module_id: builtins.str
+    request_id: builtins.int
     @property
     def data_package(self) -> global___DataPackage: ...
     @property
@@ -406,8 +412,41 @@ class ReturnDPandError(google.protobuf.message.Message):
         data_package: global___DataPackage | None = ...,
         data_package_module_id: builtins.str = ...,
         error: global___Error | None = ...,
+        request_id: builtins.int = ...,
     ) -> None: ...
     def HasField(self, field_name: typing.Literal["data_package", b"data_package", "error", b"error"]) -> builtins.bool: ...
-    def ClearField(self, field_name: typing.Literal["data_package", b"data_package", "data_package_module_id", b"data_package_module_id", "error", b"error"]) -> None: ...
+    def ClearField(self, field_name: typing.Literal["data_package", b"data_package", "data_package_module_id", b"data_package_module_id", "error", b"error", "request_id", b"request_id"]) -> None: ...
 
 global___ReturnDPandError = ReturnDPandError
+
+@typing.final
+class RequestDPBatch(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    ITEMS_FIELD_NUMBER: builtins.int
+    @property
+    def items(self) -> google.protobuf.internal.containers.RepeatedCompositeFieldContainer[global___RequestDP]: ...
+    def __init__(
+        self,
+        *,
+        items: collections.abc.Iterable[global___RequestDP] | None = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["items", b"items"]) -> None: ...
+
+global___RequestDPBatch = RequestDPBatch
+
+@typing.final
+class ReturnDPandErrorBatch(google.protobuf.message.Message):
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    ITEMS_FIELD_NUMBER: builtins.int
+    @property
+    def items(self) -> google.protobuf.internal.containers.RepeatedCompositeFieldContainer[global___ReturnDPandError]: ...
+    def __init__(
+        self,
+        *,
+        items: collections.abc.Iterable[global___ReturnDPandError] | None = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["items", b"items"]) -> None: ...
+
+global___ReturnDPandErrorBatch = ReturnDPandErrorBatch
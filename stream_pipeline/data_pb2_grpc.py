@@ -1,6 +1,7 @@
 # Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
 """Client and server classes corresponding to protobuf-defined services."""
 import grpc
+import os
 import warnings
 
 from . import data_pb2 as data__pb2
@@ -11,23 +12,25 @@ EXPECTED_ERROR_RELEASE = '1.66.0'
 SCHEDULED_RELEASE_DATE = 'August 6, 2024'
 _version_not_supported = False
 
-try:
-    from grpc._utilities import first_version_is_lower
-    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
-except ImportError:
-    _version_not_supported = True
-
-if _version_not_supported:
-    warnings.warn(
-        f'The grpc package installed is at version {GRPC_VERSION},'
-        + f' but the generated code in data_pb2_grpc.py depends on'
-        + f' grpcio>={GRPC_GENERATED_VERSION}.'
-        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
-        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
-        + f' This warning will become an error in {EXPECTED_ERROR_RELEASE},'
-        + f' scheduled for release on {SCHEDULED_RELEASE_DATE}.',
-        RuntimeWarning
-    )
+# The version check can be skipped by setting STREAM_PIPELINE_SKIP_GRPC_VERCHECK
+if not os.environ.get('STREAM_PIPELINE_SKIP_GRPC_VERCHECK'):
+    try:
+        from grpc._utilities import first_version_is_lower
+        _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+    except ImportError:
+        _version_not_supported = True
+
+    if _version_not_supported:
+        warnings.warn(
+            f'The grpc package installed is at version {GRPC_VERSION},'
+            + f' but the generated code in data_pb2_grpc.py depends on'
+            + f' grpcio>={GRPC_GENERATED_VERSION}.'
+            + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+            + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+            + f' This warning will become an error in {EXPECTED_ERROR_RELEASE},'
+            + f' scheduled for release on {SCHEDULED_RELEASE_DATE}.',
+            RuntimeWarning
+        )
 
 
 class ModuleServiceStub(object):
@@ -44,6 +47,11 @@ class ModuleServiceStub(object):
                 request_serializer=data__pb2.RequestDP.SerializeToString,
                 response_deserializer=data__pb2.ReturnDPandError.FromString,
                 _registered_method=True)
+        self.run_stream = channel.stream_stream(
+                '/data.ModuleService/run_stream',
+                request_serializer=data__pb2.RequestDPBatch.SerializeToString,
+                response_deserializer=data__pb2.ReturnDPandErrorBatch.FromString,
+                _registered_method=True)
 
 
 class ModuleServiceServicer(object):
@@ -55,6 +63,12 @@ class ModuleServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def run_stream(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_ModuleServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -63,6 +77,11 @@ def add_ModuleServiceServicer_to_server(servicer, server):
                     request_deserializer=data__pb2.RequestDP.FromString,
                     response_serializer=data__pb2.ReturnDPandError.SerializeToString,
             ),
+            'run_stream': grpc.stream_stream_rpc_method_handler(
+                    servicer.run_stream,
+                    request_deserializer=data__pb2.RequestDPBatch.FromString,
+                    response_serializer=data__pb2.ReturnDPandErrorBatch.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'data.ModuleService', rpc_method_handlers)
@@ -100,3 +119,30 @@ class ModuleService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def run_stream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/data.ModuleService/run_stream',
+            data__pb2.RequestDPBatch.SerializeToString,
+            data__pb2.ReturnDPandErrorBatch.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -24,12 +24,22 @@ class ModuleServiceStub:
         data_pb2.ReturnDPandError,
     ]
 
+    run_stream: grpc.StreamStreamMultiCallable[
+        data_pb2.RequestDPBatch,
+        data_pb2.ReturnDPandErrorBatch,
+    ]
+
 class ModuleServiceAsyncStub:
     run: grpc.aio.UnaryUnaryMultiCallable[
         data_pb2.RequestDP,
         data_pb2.ReturnDPandError,
     ]
 
+    run_stream: grpc.aio.StreamStreamMultiCallable[
+        data_pb2.RequestDPBatch,
+        data_pb2.ReturnDPandErrorBatch,
+    ]
+
 class ModuleServiceServicer(metaclass=abc.ABCMeta):
     @abc.abstractmethod
     def run(
@@ -38,4 +48,11 @@ class ModuleServiceServicer(metaclass=abc.ABCMeta):
         context: _ServicerContext,
     ) -> typing.Union[data_pb2.ReturnDPandError, collections.abc.Awaitable[data_pb2.ReturnDPandError]]: ...
 
+    @abc.abstractmethod
+    def run_stream(
+        self,
+        request_iterator: _MaybeAsyncIterator[data_pb2.RequestDPBatch],
+        context: _ServicerContext,
+    ) -> typing.Union[collections.abc.Iterator[data_pb2.ReturnDPandErrorBatch], collections.abc.AsyncIterator[data_pb2.ReturnDPandErrorBatch]]: ...
+
 def add_ModuleServiceServicer_to_server(servicer: ModuleServiceServicer, server: typing.Union[grpc.Server, grpc.aio.Server]) -> None: ...
@@ -0,0 +1,172 @@
+import atexit
+from collections import deque
+from concurrent.futures import Future
+import itertools
+import random
+import threading
+import weakref
+from typing import Any, Callable, Deque, List, Optional, Tuple
+
+Task = Tuple[Future, Callable[..., Any], Tuple[Any, ...]]
+
+# All executors that were not garbage collected, shut down at interpreter exit
+_executors: "weakref.WeakSet[WorkStealingExecutor]" = weakref.WeakSet()
+
+@atexit.register
+def _shutdown_all() -> None:
+    for executor in list(_executors):
+        executor.shutdown(wait=True)
+
+class WorkStealingExecutor:
+    """
+    Thread pool where every worker has its own task deque. A worker takes the newest task of its own deque (LIFO)
+    and, if it is empty, steals the oldest task of another worker, starting at a random one.
+    Tasks submitted from a worker go to its own deque, tasks from other threads are spread round robin.
+    Workers are started when they are needed, up to max_workers. shutdown() waits for the queued tasks,
+    it is called for every executor at interpreter exit like for ThreadPoolExecutor.
+    Like in ThreadPoolExecutor, workers only keep a weak reference to the executor and exit once it is garbage collected.
+    Attributes:
+        max_workers (int): maximum number of worker threads
+    """
+    def __init__(self, max_workers: int, thread_name_prefix: str = "WorkStealingExecutor") -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be greater than 0")
+        self.max_workers = max_workers
+        self._thread_name_prefix = thread_name_prefix
+
+        self._deques: List[Deque[Task]] = [deque() for _ in range(max_workers)]
+        self._deque_locks: List[threading.Lock] = [threading.Lock() for _ in range(max_workers)]
+        self._tasks = threading.Semaphore(0) # Number of tasks in all deques
+        self._idle = threading.Semaphore(0)  # Number of workers waiting for a task
+        self._next_deque = itertools.count()
+
+        self._threads: List[threading.Thread] = []
+        self._threads_lock = threading.Lock()
+        self._local = threading.local() # worker_index of the current thread if it belongs to this executor
+
+        self._shutdown = False
+        self._shutdown_lock = threading.Lock()
+        _executors.add(self)
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        future: Future = Future()
+        index: Optional[int] = getattr(self._local, 'worker_index', None)
+        if index is None:
+            index = next(self._next_deque) % self.max_workers
+        with self._shutdown_lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            with self._deque_locks[index]:
+                self._deques[index].append((future, fn, args))
+            self._tasks.release()
+            self._adjust_thread_count()
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stops accepting tasks. The workers finish the queued tasks and exit.
+        Args:
+            wait (bool): block until all workers have exited
+        """
+        with self._shutdown_lock:
+            self._shutdown = True
+            with self._threads_lock:
+                threads = list(self._threads)
+            # One extra permit per worker. A worker that gets one and finds no task exits.
+            for _ in threads:
+                self._tasks.release()
+        if wait:
+            for thread in threads:
+                if thread is not threading.current_thread():
+                    thread.join()
+
+    def _adjust_thread_count(self) -> None:
+        # An idle worker will pick up the task, no need for a new thread
+        if self._idle.acquire(blocking=False):
+            return
+        with self._threads_lock:
+            if len(self._threads) < self.max_workers:
+                index = len(self._threads)
+                # The callback wakes the workers when the executor is collected, so they can exit
+                def wake_up(_: Any, tasks: threading.Semaphore = self._tasks, count: int = self.max_workers) -> None:
+                    tasks.release(count)
+                thread = threading.Thread(
+                    target=_worker,
+                    args=(weakref.ref(self, wake_up), index, self._tasks, self._idle),
+                    name=f"{self._thread_name_prefix}_{index}",
+                    daemon=True,
+                )
+                self._threads.append(thread)
+                thread.start()
+
+    def _pop_task(self, index: int) -> Optional[Task]:
+        # Own deque first (newest task), then steal the oldest task of the other deques
+        with self._deque_locks[index]:
+            if self._deques[index]:
+                return self._deques[index].pop()
+
+        # A random start spreads the thieves over the workers instead of all of them hitting the same deque
+        start = random.randrange(self.max_workers)
+        for offset in range(self.max_workers):
+            victim = (start + offset) % self.max_workers
+            if victim == index or not self._deques[victim]:
+                continue
+            with self._deque_locks[victim]:
+                if self._deques[victim]:
+                    return self._deques[victim].popleft()
+        return None
+
+    def _pop_task_locked(self) -> Optional[Task]:
+        # Takes every deque lock (always in the same order), so no task can move while looking at the deques
+        for lock in self._deque_locks:
+            lock.acquire()
+        try:
+            for tasks in self._deques:
+                if tasks:
+                    return tasks.popleft()
+            return None
+        finally:
+            for lock in self._deque_locks:
+                lock.release()
+
+def _worker(executor_reference: "weakref.ref[WorkStealingExecutor]", index: int, tasks: threading.Semaphore, idle: threading.Semaphore) -> None:
+    """
+    Worker loop of WorkStealingExecutor. Only holds the executor while taking a task, so an executor
+    that is no longer used can be garbage collected and its workers exit.
+    """
+    executor = executor_reference()
+    if executor is None:
+        return
+    executor._local.worker_index = index
+    del executor
+
+    while True:
+        idle.release()
+        tasks.acquire()
+
+        executor = executor_reference()
+        if executor is None:
+            return # The permit came from the weakref callback, the executor was collected
+
+        # The semaphore guarantees that a task exists, but _pop_task can miss it while other workers
+        # take and add tasks. Looking again with all deques locked always finds it.
+        task = executor._pop_task(index)
+        if task is None:
+            task = executor._pop_task_locked()
+        del executor
+        if task is None:
+            return # The permit came from shutdown() and no task is left
+
+        _run_task(task)
+        del task # Don't keep the task alive while waiting for the next one
+
+def _run_task(task: Task) -> None:
+    future, fn, args = task
+    if not future.set_running_or_notify_cancel():
+        return
+    try:
+        result = fn(*args)
+    except BaseException as e:
+        future.set_exception(e)
+    else:
+        future.set_result(result)
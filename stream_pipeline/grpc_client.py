@@ -0,0 +1,239 @@
+import atexit
+from concurrent.futures import Future
+import functools
+import itertools
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import grpc
+
+from . import data_pb2
+from . import data_pb2_grpc
+
+# Default batching window for requests to the same external module server
+MAX_BATCH_SIZE = 64
+MAX_BATCH_WAIT = 0.001 # seconds
+
+# Default size of the run_stream pool per server
+MAX_STREAMS = 4
+MAX_PENDING_PER_STREAM = 64 # Open another stream if every stream has this many requests in flight
+
+# HTTP/2 options shared by the client channels and the server
+GRPC_OPTIONS = [
+    ('grpc.http2.write_buffer_size', 1 << 20),   # Combine small writes instead of flushing every message
+    ('grpc.http2.max_frame_size', (1 << 24) - 1), # Largest frame size allowed by HTTP/2
+    # Keep idle connections alive so the next request does not pay for a new handshake
+    ('grpc.keepalive_time_ms', 30000),
+    ('grpc.keepalive_timeout_ms', 10000),
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.max_pings_without_data', 0),
+    ('grpc.http2.min_ping_interval_without_data_ms', 10000), # Server side: accept the pings above
+]
+GRPC_COMPRESSION = grpc.Compression.Gzip
+
+_channels: Dict[Tuple[str, Tuple[Tuple[str, Any], ...], grpc.Compression], grpc.Channel] = {}
+_channels_lock = threading.Lock()
+
+def get_channel(address: str, options: Sequence[Tuple[str, Any]] = GRPC_OPTIONS, compression: grpc.Compression = GRPC_COMPRESSION) -> grpc.Channel:
+    """
+    Returns a process wide channel for the address and options. All callers with the same
+    settings share one HTTP/2 connection. gRPC channels are safe to use from multiple threads.
+    """
+    key = (address, tuple(sorted(options)), compression)
+    channel = _channels.get(key)
+    if channel is None:
+        with _channels_lock:
+            channel = _channels.get(key)
+            if channel is None:
+                channel = grpc.insecure_channel(address, options=list(options), compression=compression)
+                _channels[key] = channel
+    return channel
+
+class StreamHandle:
+    """
+    One long lived run_stream call. Batches are written to the stream by gRPC from a send queue,
+    a reader thread matches the responses to the waiting futures by request_id.
+    """
+    def __init__(self, stub: data_pb2_grpc.ModuleServiceStub, address: str) -> None:
+        self.address = address
+        self.closed = False
+
+        self._send_queue: queue.Queue[Optional[data_pb2.RequestDPBatch]] = queue.Queue()
+        self._pending: Dict[int, Future[data_pb2.ReturnDPandError]] = {}
+        self._lock = threading.Lock()
+
+        self._responses = stub.run_stream(self._request_iterator())
+        self._reader = threading.Thread(target=self._read_loop, name=f"StreamHandle-{address}", daemon=True)
+        self._reader.start()
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def send(self, batch: List[Tuple[data_pb2.RequestDP, Future[data_pb2.ReturnDPandError]]]) -> bool:
+        """
+        Writes a batch to the stream. Returns False if the stream is already closed.
+        """
+        with self._lock:
+            if self.closed:
+                return False
+            for request, future in batch:
+                self._pending[request.request_id] = future
+        # A caller that stops waiting cancels its future, the response is then dropped
+        for request, future in batch:
+            future.add_done_callback(functools.partial(self._discard, request.request_id))
+
+        request_batch = data_pb2.RequestDPBatch()
+        request_batch.items.extend([request for request, _ in batch])
+        self._send_queue.put(request_batch)
+        return True
+
+    def close(self) -> None:
+        """
+        Ends the request side of the stream. Requests already sent are still answered.
+        """
+        self._send_queue.put(None)
+
+    def _discard(self, request_id: int, future: Future) -> None:
+        if future.cancelled():
+            with self._lock:
+                self._pending.pop(request_id, None)
+
+    def _request_iterator(self) -> Iterator[data_pb2.RequestDPBatch]:
+        while True:
+            request_batch = self._send_queue.get()
+            if request_batch is None:
+                return
+            yield request_batch
+
+    def _read_loop(self) -> None:
+        error: Exception
+        try:
+            for response_batch in self._responses:
+                for response in response_batch.items:
+                    with self._lock:
+                        future = self._pending.pop(response.request_id, None)
+                    if future and future.set_running_or_notify_cancel():
+                        future.set_result(response)
+            error = RuntimeError(f"Stream to {self.address} was closed by the server.")
+        except Exception as e:
+            error = e
+
+        # Fail everything that is still waiting for a response of this stream
+        with self._lock:
+            self.closed = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(error)
+
+class RequestBatcher:
+    """
+    Collects requests for one gRPC server and sends them together as one batch over a pool of run_stream calls.
+    The first request of a batch waits at most `max_wait` seconds for more requests to arrive.
+    Attributes:
+        address (str): address of the gRPC server (host:port)
+        max_batch (int): maximum number of requests in one batch
+        max_wait (float): time in seconds to wait for more requests before sending a batch
+        max_streams (int): maximum number of open streams to the server
+        max_pending_per_stream (int): open another stream if every stream has this many requests in flight
+    """
+    def __init__(self, host: str, port: int, max_batch: int = MAX_BATCH_SIZE, max_wait: float = MAX_BATCH_WAIT, max_streams: int = MAX_STREAMS, max_pending_per_stream: int = MAX_PENDING_PER_STREAM) -> None:
+        self.address = f"{host}:{port}"
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_streams = max_streams
+        self.max_pending_per_stream = max_pending_per_stream
+
+        self._channel = get_channel(self.address)
+        self._stub = data_pb2_grpc.ModuleServiceStub(self._channel)
+        self._queue: queue.Queue[Tuple[data_pb2.RequestDP, Future[data_pb2.ReturnDPandError]]] = queue.Queue()
+        self._request_ids = itertools.count(1)
+        self._streams: List[StreamHandle] = [] # Only used by the dispatcher thread
+
+        self._thread = threading.Thread(target=self._dispatch_loop, name=f"RequestBatcher-{self.address}", daemon=True)
+        self._thread.start()
+
+    def submit(self, request: data_pb2.RequestDP) -> Future[data_pb2.ReturnDPandError]:
+        """
+        Queues a request for the next batch. The returned future resolves to the response of this request.
+        """
+        request.request_id = next(self._request_ids)
+        future: Future[data_pb2.ReturnDPandError] = Future()
+        self._queue.put((request, future))
+        return future
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._send(batch)
+
+    def close(self) -> None:
+        """
+        Ends all open streams of this batcher.
+        """
+        for stream in list(self._streams):
+            stream.close()
+
+    def _get_stream(self) -> StreamHandle:
+        """
+        Returns the open stream with the fewest requests in flight. Opens a new stream if all are busy.
+        """
+        self._streams = [stream for stream in self._streams if not stream.closed]
+        stream = min(self._streams, key=lambda s: s.pending_count(), default=None)
+        if stream is None or (stream.pending_count() >= self.max_pending_per_stream and len(self._streams) < self.max_streams):
+            stream = StreamHandle(self._stub, self.address)
+            self._streams.append(stream)
+        return stream
+
+    def _send(self, batch: List[Tuple[data_pb2.RequestDP, Future[data_pb2.ReturnDPandError]]]) -> None:
+        try:
+            # A stream can close between picking and sending. Closed streams are dropped by _get_stream.
+            while not self._get_stream().send(batch):
+                pass
+        except Exception as e:
+            for _, future in batch:
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(e)
+
+_batchers: Dict[str, RequestBatcher] = {}
+_batchers_lock = threading.Lock()
+
+def get_request_batcher(host: str, port: int) -> RequestBatcher:
+    """
+    Returns the process wide request batcher for the given gRPC server. Creates it on first use.
+    """
+    address = f"{host}:{port}"
+    batcher = _batchers.get(address)
+    if batcher is None:
+        with _batchers_lock:
+            batcher = _batchers.get(address)
+            if batcher is None:
+                batcher = RequestBatcher(host, port)
+                _batchers[address] = batcher
+    return batcher
+
+@atexit.register
+def close_all() -> None:
+    """
+    Closes all streams and channels of this process. Registered with atexit.
+    """
+    with _batchers_lock:
+        for batcher in _batchers.values():
+            batcher.close()
+        _batchers.clear()
+    with _channels_lock:
+        for channel in _channels.values():
+            channel.close()
+        _channels.clear()
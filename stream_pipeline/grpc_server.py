@@ -1,22 +1,36 @@
 from concurrent import futures
 import grpc
+import queue
+import threading
 import time
-from typing import Any, Generic, Optional, Tuple, TypeVar, Union
+from typing import Any, Generic, Iterator, Optional, Tuple, TypeVar, Union
 
 from .data_package import DataPackage, DataPackageController, DataPackagePhase, DataPackageModule
 
+from .grpc_client import GRPC_COMPRESSION, GRPC_OPTIONS
 from .logger import exception_to_error
 
 from .module_classes import Module 
-from .data_pb2 import ReturnDPandError, RequestDP, Error
+from .data_pb2 import ReturnDPandError, RequestDP, ReturnDPandErrorBatch, RequestDPBatch
 from .data_pb2_grpc import ModuleServiceServicer as ModuleServiceServicerBase, add_ModuleServiceServicer_to_server
 
 T = TypeVar('T')
 
+# Every open run_stream call keeps one thread of the gRPC server busy. A client process opens up to
+# grpc_client.MAX_STREAMS streams per server, so this serves 8 client processes. Streams beyond the limit
+# are rejected with RESOURCE_EXHAUSTED instead of waiting for a free thread.
+MAX_SERVER_STREAMS = 32
+# Threads of the gRPC server for unary run calls, next to the ones for the streams
+MAX_UNARY_CALLS = 10
+
 # ModuleServiceServicer implementation
 class ModuleServiceServicer(Generic[T], ModuleServiceServicerBase):
-    def __init__(self, module: Module):
+    def __init__(self, module: Module, max_workers: int = 10, max_streams: int = MAX_SERVER_STREAMS):
         self.module = module
+        self._executor = futures.ThreadPoolExecutor(max_workers=max_workers) # Runs the items of a batch in parallel
+        self.max_streams = max_streams
+        self._streams = 0
+        self._streams_lock = threading.Lock()
 
     def run(self, request_grpc: RequestDP, context: grpc.ServicerContext) -> ReturnDPandError:
         dp: Union[None, DataPackage] = None
@@ -39,8 +53,74 @@ class ModuleServiceServicer(Generic[T], ModuleServiceServicerBase):
                 return_dp_and_error = ReturnDPandError()
                 err = exception_to_error(nested_exception)
                 if err:
-                    return_dp_and_error.error.CopyFrom(err.to_grpc())
+                    err._fill_grpc(return_dp_and_error.error)
                 return return_dp_and_error
+
+    def run_stream(self, request_iterator: Iterator[RequestDPBatch], context: grpc.ServicerContext) -> Iterator[ReturnDPandErrorBatch]:
+        with self._streams_lock:
+            accepted = self._streams < self.max_streams
+            if accepted:
+                self._streams += 1
+        if not accepted:
+            context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, f"Too many streams, this server accepts {self.max_streams}.")
+        try:
+            yield from self._run_stream(request_iterator, context)
+        finally:
+            with self._streams_lock:
+                self._streams -= 1
+
+    def _run_stream(self, request_iterator: Iterator[RequestDPBatch], context: grpc.ServicerContext) -> Iterator[ReturnDPandErrorBatch]:
+        # Requests are read in a separate thread and executed in parallel. Responses are sent as soon as they are
+        # done (not in request order), the client matches them by request_id.
+        responses: queue.Queue[Optional[ReturnDPandError]] = queue.Queue()
+        in_flight = 0
+        in_flight_condition = threading.Condition()
+
+        def run_item(item: RequestDP) -> None:
+            nonlocal in_flight
+            try:
+                return_dp_and_error = self.run(item, context)
+                return_dp_and_error.request_id = item.request_id
+                responses.put(return_dp_and_error)
+            finally:
+                with in_flight_condition:
+                    in_flight -= 1
+                    in_flight_condition.notify_all()
+
+        def read_requests() -> None:
+            nonlocal in_flight
+            try:
+                for request_batch in request_iterator:
+                    for item in request_batch.items:
+                        with in_flight_condition:
+                            in_flight += 1
+                        self._executor.submit(run_item, item)
+            except Exception:
+                pass # The client closed the stream
+            finally:
+                with in_flight_condition:
+                    in_flight_condition.wait_for(lambda: in_flight == 0)
+                responses.put(None)
+
+        threading.Thread(target=read_requests, daemon=True).start()
+
+        while True:
+            # Send everything that is done in one batch
+            response = responses.get()
+            if response is None:
+                return
+            return_batch = ReturnDPandErrorBatch()
+            return_batch.items.append(response)
+            while True:
+                try:
+                    response = responses.get_nowait()
+                except queue.Empty:
+                    break
+                if response is None:
+                    yield return_batch
+                    return
+                return_batch.items.append(response)
+            yield return_batch
             
     # Function to convert gRPC message to normal objects
     def grpc_to_normal(self, request_grpc: RequestDP) -> Tuple[DataPackage[T], DataPackageController, DataPackagePhase, DataPackageModule]:
@@ -95,31 +175,37 @@ class ModuleServiceServicer(Generic[T], ModuleServiceServicerBase):
 
     # Function to convert normal objects to gRPC messages
     def normal_to_grpc(self, request: Union[DataPackage[T], None], sub_module: Optional[DataPackageModule], error: Optional[Exception] = None) -> ReturnDPandError:
-        error_grpc: Optional[Error] = None
-        if error:
-            error = exception_to_error(error)
-            if error:
-                error_grpc = error.to_grpc()
-
         sub_dpm_id = sub_module.id if sub_module else ""        
 
-        request_grpc = request.to_grpc() if request else None
-
+        # Write straight into the fields of the response instead of building messages and copying them in
         return_dp_and_error = ReturnDPandError()
-        if request_grpc:
-            return_dp_and_error.data_package.CopyFrom(request_grpc)
+        if request:
+            request._fill_grpc(return_dp_and_error.data_package)
         return_dp_and_error.data_package_module_id = sub_dpm_id
-        if error_grpc:
-            return_dp_and_error.error.CopyFrom(error_grpc)
+        if error:
+            err = exception_to_error(error)
+            if err:
+                err._fill_grpc(return_dp_and_error.error)
         return return_dp_and_error
 
 # gRPC server class
 class GrpcServer(Generic[T]):
-    def __init__(self, module: Module, port: int):
+    """
+    Serves a module over gRPC.
+    Attributes:
+        module (Module): module to run for the requests
+        port (int): port to listen on
+        max_workers (int): number of requests that are executed in parallel
+        max_streams (int): maximum number of open run_stream calls, see MAX_SERVER_STREAMS
+    """
+    def __init__(self, module: Module, port: int, max_workers: int = 10, max_streams: int = MAX_SERVER_STREAMS):
         self.module = module
         self.port = port
-        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-        add_ModuleServiceServicer_to_server(ModuleServiceServicer[T](self.module), self.server)
+        # Enough threads for every stream and the unary calls. More calls are rejected instead of queued,
+        # a queued stream would never get a thread while the others stay open.
+        max_rpcs = max_streams + MAX_UNARY_CALLS
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_rpcs), options=GRPC_OPTIONS, compression=GRPC_COMPRESSION, maximum_concurrent_rpcs=max_rpcs)
+        add_ModuleServiceServicer_to_server(ModuleServiceServicer[T](self.module, max_workers, max_streams), self.server)
         self.server.add_insecure_port(f'[::]:{self.port}')
     
     def start(self) -> None:
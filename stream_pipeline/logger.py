@@ -1,11 +1,12 @@
 import json
 import os
+import reprlib
 import sys
 import threading
 import traceback
 from dataclasses import dataclass, field
 from types import TracebackType
-from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple, Type, Union
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple, Type, Union, overload
 import uuid
 
 from . import data_pb2
@@ -165,21 +166,30 @@ class Error (ThreadSafeClass, Exception):
         return RemoteException(self)
 
     def set_from_grpc(self, grpc_error: data_pb2.Error) -> None:
-        self.id = grpc_error.id
-        self.type = grpc_error.type
-        self.message = grpc_error.message
-        self.traceback = list(grpc_error.traceback)  # Convert repeated fields to list
-        self.thread = grpc_error.thread  # Directly set the field
-        self.start_context = grpc_error.start_context  # Directly set the field
-        self.thread_id = grpc_error.thread_id  # Directly set the field
-        self.is_daemon = grpc_error.is_daemon  # Directly set the field
-        self.local_vars = dict(grpc_error.local_vars)  # Convert map fields to dict
-        self.global_vars = dict(grpc_error.global_vars)  # Convert map fields to dict
-        self.environment_vars = dict(grpc_error.environment_vars)  # Convert map fields to dict
-        self.module_versions = dict(grpc_error.module_versions)  # Convert map fields to dict
+        self._set_attributes({
+            'id': grpc_error.id,
+            'type': grpc_error.type,
+            'message': grpc_error.message,
+            'traceback': list(grpc_error.traceback),  # Convert repeated fields to list
+            'thread': grpc_error.thread,
+            'start_context': grpc_error.start_context,
+            'thread_id': grpc_error.thread_id,
+            'is_daemon': grpc_error.is_daemon,
+            'local_vars': dict(grpc_error.local_vars),  # Convert map fields to dict
+            'global_vars': dict(grpc_error.global_vars),
+            'environment_vars': dict(grpc_error.environment_vars),
+            'module_versions': dict(grpc_error.module_versions),
+        })
 
     def to_grpc(self) -> data_pb2.Error:
         grpc_error = data_pb2.Error()
+        self._fill_grpc(grpc_error)
+        return grpc_error
+
+    def _fill_grpc(self, grpc_error: data_pb2.Error) -> None:
+        """
+        Writes the error into an empty gRPC error, e.g. the error field of a message.
+        """
         grpc_error.id = self.id
         grpc_error.type = self.type
         grpc_error.message = self.message
@@ -196,7 +206,6 @@ class Error (ThreadSafeClass, Exception):
         grpc_error.global_vars.update(self.global_vars)
         grpc_error.environment_vars.update(self.environment_vars)
         grpc_error.module_versions.update(self.module_versions)
-        return grpc_error
     
     def to_exception(self) -> Exception:
         return RemoteException(self)
@@ -222,35 +231,35 @@ class PipelineLogger:
     _original_threading_excepthook: Callable[[threading.ExceptHookArgs], Any] = threading.excepthook  # Save original threading excepthook
 
     def __new__(cls) -> 'PipelineLogger':
+        # The instance is created once while this module is imported (see pipeline_logger below),
+        # imports are serialized, so no lock is needed here.
         if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super(PipelineLogger, cls).__new__(cls)
-                    cls._instance.options = ErrorLoggerOptions()
-                    cls._instance.debug = True
-                    cls._instance.info_callback = None # : Optional[Callable[[object, object, Optional[_ExcInfoType], bool, int, Mapping[str, object] | None], None]]
-                    cls._instance.warning_callback = None # : Optional[Callable[[object, object, Optional[_ExcInfoType], bool, int, Mapping[str, object] | None], None]]
-                    cls._instance.error_callback = None # : Optional[Callable[[object, object, Optional[_ExcInfoType], bool, int, Mapping[str, object] | None], None]]
-                    cls._instance.critical_callback = None # : Optional[Callable[[object, object, Optional[_ExcInfoType], bool, int, Mapping[str, object] | None], None]]
-                    cls._instance.log_callback = None # : Optional[Callable[[int, object, object, Optional[_ExcInfoType], bool, int, Mapping[str, object] | None], None]]
-                    cls._instance.exception_callback = None # : Optional[Callable[[object, object, Optional[_ExcInfoType], bool, int, Mapping[str, object] | None], None]]
+            cls._instance = super(PipelineLogger, cls).__new__(cls)
+            cls._instance.options = ErrorLoggerOptions()
+            cls._instance.debug = True
+            cls._instance.info_callback = None # : Optional[Callable[[object, object, Optional[_ExcInfoType], bool, int, Mapping[str, object] | None], None]]
+            cls._instance.warning_callback = None # : Optional[Callable[[object, object, Optional[_ExcInfoType], bool, int, Mapping[str, object] | None], None]]
+            cls._instance.error_callback = None # : Optional[Callable[[object, object, Optional[_ExcInfoType], bool, int, Mapping[str, object] | None], None]]
+            cls._instance.critical_callback = None # : Optional[Callable[[object, object, Optional[_ExcInfoType], bool, int, Mapping[str, object] | None], None]]
+            cls._instance.log_callback = None # : Optional[Callable[[int, object, object, Optional[_ExcInfoType], bool, int, Mapping[str, object] | None], None]]
+            cls._instance.exception_callback = None # : Optional[Callable[[object, object, Optional[_ExcInfoType], bool, int, Mapping[str, object] | None], None]]
         return cls._instance
 
+    # The getters don't lock. options is an immutable NamedTuple and debug a bool, both are replaced
+    # with a single assignment, so readers always see either the old or the new value.
     def set_options(self, options: ErrorLoggerOptions) -> None:
         with self._lock:
             self.options = options
 
     def get_options(self) -> ErrorLoggerOptions:
-        with self._lock:
-            return self.options
+        return self.options
     
     def set_debug(self, debug: bool) -> None:
         with self._lock:
             self.debug = debug
     
     def get_debug(self) -> bool:
-        with self._lock:
-            return self.debug
+        return self.debug
         
     def set_info(self, info_callback: Optional[Callable[[str, Tuple, Dict], None]]) -> None:
         with self._lock:
@@ -324,13 +333,109 @@ class PipelineLogger:
             # Reset to the original threading excepthook
             threading.excepthook = self._original_threading_excepthook
 
-def format_vars(variables: Dict[str, Any]) -> Dict[str, str]:
-    formatted_vars = {}
-    for key, value in variables.items():
-        formatted_vars[key] = f"{type(value).__name__} = {repr(value)}"
-    return formatted_vars
+# The single PipelineLogger instance. PipelineLogger() returns the same object.
+pipeline_logger = PipelineLogger()
+
+# Limits the size of the variable values in errors. Large containers are cut off instead of fully formatted.
+_var_repr = reprlib.Repr()
+_var_repr.maxstring = 200
+_var_repr.maxother = 200
+_var_repr.maxlist = 20
+_var_repr.maxtuple = 20
+_var_repr.maxset = 20
+_var_repr.maxfrozenset = 20
+_var_repr.maxdict = 20
 
-def exception_to_error(exc: Union[BaseException, Error, None]) -> Union[Error, None]:
+def format_vars(variables: Dict[str, Any]) -> Dict[str, str]:
+    if not variables:
+        return {}
+    var_repr = _var_repr.repr
+    return {key: f"{type(value).__name__} = {var_repr(value)}" for key, value in variables.items()}
+
+# Versions of the loaded modules, together with the module object they were read from.
+# A module that was removed and imported again is a new object, so its version is read again.
+_module_versions: Dict[str, Tuple[Any, str]] = {}
+_module_versions_lock = threading.Lock()
+
+def get_module_versions() -> Dict[str, str]:
+    versions: Dict[str, str] = {}
+    with _module_versions_lock:
+        for module_name, module in list(sys.modules.items()):
+            cached = _module_versions.get(module_name)
+            if cached is None or cached[0] is not module:
+                version = getattr(module, '__version__', None)
+                cached = (module, str(version) if version is not None else 'N/A')
+                _module_versions[module_name] = cached
+            versions[module_name] = cached[1]
+
+        # Forget modules that are no longer loaded
+        if len(_module_versions) != len(versions):
+            for module_name in _module_versions.keys() - versions.keys():
+                del _module_versions[module_name]
+    return versions
+
+_CAUSE_MESSAGE = "The above exception was the direct cause of the following exception:"
+_CONTEXT_MESSAGE = "During handling of the above exception, another exception occurred:"
+
+def format_traceback(te: traceback.TracebackException) -> List[str]:
+    """
+    Formats a traceback like traceback.format_exception, but every frame is only "file:line".
+    Chained exceptions come first, like in the default output.
+    """
+    formatted_traceback: List[str] = []
+    if te.__cause__ is not None:
+        formatted_traceback.extend(format_traceback(te.__cause__))
+        formatted_traceback.append(_CAUSE_MESSAGE)
+    elif te.__context__ is not None and not te.__suppress_context__:
+        formatted_traceback.extend(format_traceback(te.__context__))
+        formatted_traceback.append(_CONTEXT_MESSAGE)
+
+    if te.stack:
+        formatted_traceback.append("Traceback (most recent call last):")
+        formatted_traceback.extend(_format_stack(te.stack))
+    for line in te.format_exception_only():
+        # SyntaxError has a '  File "...", line N' line of its own
+        if line.startswith('  File '):
+            parts = line.strip().split(',')
+            file_path = parts[0].split('"')[1]
+            line_number = parts[1].split(' ')[-1]
+            formatted_traceback.append(f"{file_path}:{line_number}")
+        else:
+            formatted_traceback.append(line.strip())
+    return formatted_traceback
+
+# Same as traceback._RECURSIVE_CUTOFF: only this many repeats of the same frame are shown
+_RECURSIVE_CUTOFF = 3
+
+def _format_stack(stack: traceback.StackSummary) -> List[str]:
+    """
+    Formats the frames as "file:line" and collapses repeated frames like StackSummary.format does.
+    """
+    formatted_stack: List[str] = []
+    last_frame = None
+    count = 0
+    for frame in stack:
+        current_frame = (frame.filename, frame.lineno, frame.name)
+        if current_frame != last_frame:
+            if count > _RECURSIVE_CUTOFF:
+                formatted_stack.append(_format_repeated(count - _RECURSIVE_CUTOFF))
+            last_frame = current_frame
+            count = 0
+        count += 1
+        if count <= _RECURSIVE_CUTOFF:
+            formatted_stack.append(f"{frame.filename}:{frame.lineno}")
+    if count > _RECURSIVE_CUTOFF:
+        formatted_stack.append(_format_repeated(count - _RECURSIVE_CUTOFF))
+    return formatted_stack
+
+def _format_repeated(count: int) -> str:
+    return f"[Previous line repeated {count} more time{'s' if count > 1 else ''}]"
+
+@overload
+def exception_to_error(exc: Union[BaseException, Error], options: Optional[ErrorLoggerOptions] = None) -> Error: ...
+@overload
+def exception_to_error(exc: None, options: Optional[ErrorLoggerOptions] = None) -> None: ...
+def exception_to_error(exc: Union[BaseException, Error, None], options: Optional[ErrorLoggerOptions] = None) -> Union[Error, None]:
     if exc is None:
         return None
     if isinstance(exc, Error):
@@ -340,92 +445,98 @@ def exception_to_error(exc: Union[BaseException, Error, None]) -> Union[Error, N
     exc_type = type(exc)
     exc_value = exc
     exc_traceback = exc.__traceback__
-    
-    tb_lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
+
+    # Only collect what the logger is configured to output
+    if options is None:
+        options = pipeline_logger.get_options()
+
     formatted_traceback: List[str] = []
 
     local_vars: Dict[str, str] = {}
     global_vars: Dict[str, str] = {}
 
-    if exc_traceback is not None:
+    if exc_traceback is not None and (options.local_vars or options.global_vars):
         tb = exc_traceback
         while tb.tb_next:
             tb = tb.tb_next
         frame = tb.tb_frame
-        local_vars = format_vars(frame.f_locals)
-        global_vars = format_vars({key: value for key, value in frame.f_globals.items() if not key.startswith('__')})
+        if options.local_vars:
+            local_vars = format_vars(frame.f_locals)
+        if options.global_vars:
+            global_vars = format_vars({key: value for key, value in frame.f_globals.items() if not key.startswith('__')})
 
-    for line in tb_lines:
-        if line.startswith('  File '):
-            parts = line.strip().split(',')
-            file_path = parts[0].split('"')[1]
-            line_number = parts[1].split(' ')[-1]
-            formatted_traceback.append(f"{file_path}:{line_number}")
-        else:
-            formatted_traceback.append(line.strip())
+    if options.traceback:
+        formatted_traceback = format_traceback(traceback.TracebackException(exc_type, exc_value, exc_traceback))
 
     current_thread = threading.current_thread()
+    thread_name = current_thread.name
+    thread_id = current_thread.ident
+    is_daemon = current_thread.daemon
     start_context = getattr(current_thread, 'start_context', 'N/A')
 
     error = Error()
     error.type=exc_type.__name__
     error.message=str(exc_value)
     error.traceback=formatted_traceback
-    error.thread=current_thread.name
+    error.thread=thread_name
     error.start_context=start_context
-    error.thread_id=current_thread.ident
-    error.is_daemon=current_thread.daemon
+    error.thread_id=thread_id
+    error.is_daemon=is_daemon
     error.local_vars=local_vars
     error.global_vars=global_vars
-    error.environment_vars={key: os.environ[key] for key in os.environ}
-    error.module_versions = {module: sys.modules[module].__version__ if hasattr(sys.modules[module], '__version__') else 'N/A' for module in list(sys.modules.keys())}
+    error.environment_vars = dict(os.environ) if options.environment_vars else {}
+    error.module_versions = get_module_versions() if options.module_versions else {}
 
     return error
 
+# (option, output key) for every field json_error_handler_dict can output. The key is also the Error attribute.
+_ERROR_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ('id', 'id'),
+    ('exc_type', 'type'),
+    ('message', 'message'),
+    ('traceback', 'traceback'),
+    ('thread', 'thread'),
+    ('start_context', 'start_context'),
+    ('thread_id', 'thread_id'),
+    ('is_daemon', 'is_daemon'),
+    ('local_vars', 'local_vars'),
+    ('global_vars', 'global_vars'),
+    ('environment_vars', 'environment_vars'),
+    ('module_versions', 'module_versions'),
+)
+_error_fields_cache: Dict[ErrorLoggerOptions, Tuple[str, ...]] = {}
+
+def _get_error_fields(options: ErrorLoggerOptions) -> Tuple[str, ...]:
+    """
+    Returns the output keys enabled by the options. Computed once per options value.
+    """
+    fields = _error_fields_cache.get(options)
+    if fields is None:
+        fields = tuple(key for option, key in _ERROR_FIELDS if getattr(options, option))
+        _error_fields_cache[options] = fields
+    return fields
+
 def json_error_handler_dict(exc: Union[BaseException, Error, None]) -> Union[Dict[str, str], None]:
     if exc is None:
         return {}
 
+    options = pipeline_logger.get_options()
+
     if isinstance(exc, BaseException):
-        error_obj = exception_to_error(exc)
+        error_obj = exception_to_error(exc, options)
     else:
         error_obj = exc
 
     if error_obj is None:
         return None
-
-    error_logger = PipelineLogger()
-    options = error_logger.get_options()
     
     minimal_error_info = {
         "message": "Something went wrong.",
     }
 
-    if error_logger.get_debug():
-        if options.id:
-            minimal_error_info["id"] = error_obj.id
-        if options.exc_type:
-            minimal_error_info["type"] = error_obj.type
-        if options.message:
-            minimal_error_info["message"] = error_obj.message
-        if options.traceback:
-            minimal_error_info["traceback"] = error_obj.traceback # type: ignore
-        if options.thread:
-            minimal_error_info["thread"] = error_obj.thread # type: ignore
-        if options.start_context:
-            minimal_error_info["start_context"] = error_obj.start_context # type: ignore
-        if options.thread_id:
-            minimal_error_info["thread_id"] = error_obj.thread_id # type: ignore
-        if options.is_daemon:
-            minimal_error_info["is_daemon"] = error_obj.is_daemon # type: ignore
-        if options.local_vars:
-            minimal_error_info["local_vars"] = error_obj.local_vars # type: ignore
-        if options.global_vars:
-            minimal_error_info["global_vars"] = error_obj.global_vars # type: ignore
-        if options.environment_vars:
-            minimal_error_info["environment_vars"] = error_obj.environment_vars # type: ignore
-        if options.module_versions:
-            minimal_error_info["module_versions"] = error_obj.module_versions # type: ignore
+    if pipeline_logger.get_debug():
+        for key in _get_error_fields(options):
+            minimal_error_info[key] = getattr(error_obj, key)
 
     return minimal_error_info
 
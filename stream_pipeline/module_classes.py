@@ -1,18 +1,33 @@
 # module_classes.py
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
 import copy
+import itertools
 from abc import ABC, abstractmethod
+import os
 import threading
 from typing import  Any, Dict, List, Optional, Tuple, Union, final, NamedTuple
 import time
 import uuid
-import grpc
 from prometheus_client import Gauge, Summary, Counter
 
 from . import data_pb2
-from . import data_pb2_grpc
-from .logger import Error, PipelineLogger, exception_to_error
+from .grpc_client import get_request_batcher
+from .logger import Error, exception_to_error, pipeline_logger
 from .data_package import DataPackage, DataPackageModule, DataPackagePhase, DataPackageController, Status
 
+# Maximum number of threads per pool for modules with a timeout. Timed out modules keep their thread until they return,
+# so this is much more than the number of CPUs. Every nesting level has its own pool, see Module._get_executor.
+MODULE_EXECUTOR_MAX_WORKERS = (os.cpu_count() or 1) * 32
+
+# Default time in seconds an ExternalModule without a timeout waits for the response of its server.
+# A lost response fails the data package instead of blocking the worker forever.
+EXTERNAL_MODULE_RESPONSE_TIMEOUT = 300.0
+
+# Module ids are a random per process prefix and a counter. Module ids are also used by remote modules
+# and in metric labels of other processes, so the prefix keeps them unique across processes.
+_MODULE_ID_PREFIX = uuid.uuid4().hex[:12]
+_module_id_counter = itertools.count()
+
 # Metrics to track time spent on processing modules
 MODULE_INPUT_FLOWRATE = Counter("module_input_flowrate", "The flowrate of the module input", ["pipeline_name", "pipeline_id", "pipeline_instance_id", "controller_name", "controller_id", "phase_name", "phase_id", "module_name", "module_id"])
 MODULE_OUTPUT_FLOWRATE = Counter("module_output_flowrate", "The flowrate of the module output", ["pipeline_name", "pipeline_id", "pipeline_instance_id", "controller_name", "controller_id", "phase_name", "phase_id", "module_name", "module_id"])
@@ -29,6 +44,24 @@ MODULE_WAITING_TIME = Summary("module_waiting_time", "Time spent waiting for a m
 MODULE_WAITING_COUNTER = Gauge("module_waiting_counter", "Number of modules waiting to execute", ["pipeline_name", "pipeline_id", "pipeline_instance_id", "controller_name", "controller_id", "phase_name", "phase_id", "module_name", "module_id"])
 MODULE_PROCESSING_COUNTER = Gauge("module_processing_counter", "Number of modules currently executing", ["pipeline_name", "pipeline_id", "pipeline_instance_id", "controller_name", "controller_id", "phase_name", "phase_id", "module_name", "module_id"])
 
+class ModuleMetrics(NamedTuple):
+    """
+    Metrics of one module bound to the labels of a pipeline instance, controller and phase.
+    """
+    input_flowrate: Counter
+    output_flowrate: Counter
+    exit_flowrate: Counter
+    error_flowrate: Counter
+    success_time: Summary
+    exit_time: Summary
+    error_time: Summary
+    waiting_time: Summary
+    waiting_counter: Gauge
+    processing_counter: Gauge
+
+def _set_executor_level(level: int) -> None:
+    threading.current_thread().module_executor_level = level # type: ignore
+
 class ModuleOptions(NamedTuple):
     """
     Named tuple to store options for modules.
@@ -43,13 +76,15 @@ class Module(ABC):
     """
     Abstract base class for modules.
     """
-    _locks: Dict[int, threading.RLock] = {}
+    _executors: List[ThreadPoolExecutor] = [] # One pool per nesting level, shared by all modules, see _get_executor
+    _executor_lock = threading.Lock()
 
     def __init__(self, options: ModuleOptions = ModuleOptions(), name: str = ""):
-        self._id = "M-" + self.__class__.__name__ + "-" + str(uuid.uuid4()) 
+        self._id = f"M-{self.__class__.__name__}-{_MODULE_ID_PREFIX}-{next(_module_id_counter)}"
         self._name = name if name else "M-" + self.__class__.__name__
-        self._use_mutex = options.use_mutex
+        self._mutex: Optional[threading.Lock] = threading.Lock() if options.use_mutex else None # Lock of this module instance, only taken once per run
         self._timeout = options.timeout if options.timeout > 0.0 else None
+        self._metrics: Dict[Tuple[str, ...], ModuleMetrics] = {} # Bound metrics per label values, see _get_metrics
 
     def get_id(self) -> str:
         return self._id
@@ -57,39 +92,43 @@ class Module(ABC):
     def get_name(self) -> str:
         return self._name
 
-    @property
-    def _mutex(self) -> threading.RLock:
+    def _get_metrics(self, dp: DataPackage, dpc: DataPackageController, dpp: DataPackagePhase) -> ModuleMetrics:
         """
-        Provides a reentrant lock for each module instance.
-        """
-        if id(self) not in self._locks:
-            self._locks[id(self)] = threading.RLock()
-        return self._locks[id(self)]
-    
-    def __del__(self) -> None:
+        Returns the metrics of this module bound to the labels of the data package. Bound once per pipeline instance, controller and phase.
         """
-        Destructor to remove the lock for the module.
-        """
-        if id(self) in self._locks:
-            del self._locks[id(self)]
+        key = (dp.pipeline_name, dp.pipeline_id, dp.pipeline_instance_id, dpc.controller_name, dpc.controller_id, dpp.phase_name, dpp.phase_id)
+        metrics = self._metrics.get(key)
+        if metrics is None:
+            labels = key + (self._name, self._id)
+            metrics = ModuleMetrics(
+                input_flowrate=MODULE_INPUT_FLOWRATE.labels(*labels),
+                output_flowrate=MODULE_OUTPUT_FLOWRATE.labels(*labels),
+                exit_flowrate=MODULE_EXIT_FLOWRATE.labels(*labels),
+                error_flowrate=MODULE_ERROR_FLOWRATE.labels(*labels),
+                success_time=MODULE_SUCCESS_TIME.labels(*labels),
+                exit_time=MODULE_EXIT_TIME.labels(*labels),
+                error_time=MODULE_ERROR_TIME.labels(*labels),
+                waiting_time=MODULE_WAITING_TIME.labels(*labels),
+                waiting_counter=MODULE_WAITING_COUNTER.labels(*labels),
+                processing_counter=MODULE_PROCESSING_COUNTER.labels(*labels),
+            )
+            self._metrics[key] = metrics
+        return metrics
 
     def run(self, dp: DataPackage, dpc: DataPackageController, dpp: DataPackagePhase, parent_module: Optional[DataPackageModule] = None) -> DataPackageModule:
         """
         Wrapper method that executes the module's main logic within a thread-safe context.
         Measures and records the execution time and waiting time.
         """
+        metrics = self._get_metrics(dp, dpc, dpp)
+        metrics.input_flowrate.inc()
         
-        MODULE_INPUT_FLOWRATE.labels(pipeline_name=dp.pipeline_name, pipeline_id=dp.pipeline_id, pipeline_instance_id=dp.pipeline_instance_id, controller_name=dpc.controller_name, controller_id=dpc.controller_id, phase_name=dpp.phase_name, phase_id=dpp.phase_id, module_name=self._name, module_id=self._id).inc()
-        
-        dpm = DataPackageModule()
-        dpm.module_id=self._id
-        dpm.module_name=self._name
-        dpm.status=Status.RUNNING
-        dpm.start_time=0.0
-        dpm.end_time=0.0
-        dpm.waiting_time=0.0
-        dpm.total_time=0.0
-        dpm.error=None
+        # time.time() for the timestamps, time.perf_counter_ns() for the durations (int nanoseconds, converted to seconds once)
+        start_time = time.time()
+        start_counter = time.perf_counter_ns()
+
+        # The constructor sets the fields directly, no other thread can see dpm yet
+        dpm = DataPackageModule(_module_id=self._id, _module_name=self._name, _status=Status.RUNNING, _start_time=start_time)
         
         # Add the module to the parent module if it exists
         if parent_module:
@@ -97,31 +136,30 @@ class Module(ABC):
         else:
             dpp.modules.append(dpm)
         
-        start_time = time.time()
-        dpm.start_time = start_time
         waiting_time = 0.0
-        if self._use_mutex:
+        mutex = self._mutex
+        if mutex is not None:
             dpm.status=Status.WAITING
-            MODULE_WAITING_COUNTER.labels(pipeline_name=dp.pipeline_name, pipeline_id=dp.pipeline_id, pipeline_instance_id=dp.pipeline_instance_id, controller_name=dpc.controller_name, controller_id=dpc.controller_id, phase_name=dpp.phase_name, phase_id=dpp.phase_id, module_name=self._name, module_id=self._id).inc()
-            self._mutex.acquire()
-            MODULE_WAITING_COUNTER.labels(pipeline_name=dp.pipeline_name, pipeline_id=dp.pipeline_id, pipeline_instance_id=dp.pipeline_instance_id, controller_name=dpc.controller_name, controller_id=dpc.controller_id, phase_name=dpp.phase_name, phase_id=dpp.phase_id, module_name=self._name, module_id=self._id).dec()
-            waiting_time = time.time() - start_time
+            metrics.waiting_counter.inc()
+            mutex.acquire()
+            metrics.waiting_counter.dec()
+            waiting_time = (time.perf_counter_ns() - start_counter) * 1e-9
             dpm.waiting_time = waiting_time
             dpm.status=Status.RUNNING
-            MODULE_WAITING_TIME.labels(pipeline_name=dp.pipeline_name, pipeline_id=dp.pipeline_id, pipeline_instance_id=dp.pipeline_instance_id, controller_name=dpc.controller_name, controller_id=dpc.controller_id, phase_name=dpp.phase_name, phase_id=dpp.phase_id, module_name=self._name, module_id=self._id).observe(waiting_time)
+            metrics.waiting_time.observe(waiting_time)
         
-        MODULE_PROCESSING_COUNTER.labels(pipeline_name=dp.pipeline_name, pipeline_id=dp.pipeline_id, pipeline_instance_id=dp.pipeline_instance_id, controller_name=dpc.controller_name, controller_id=dpc.controller_id, phase_name=dpp.phase_name, phase_id=dpp.phase_id, module_name=self._name, module_id=self._id).inc()
-        # Create a thread to execute the execute method
-        execute_thread = threading.Thread(target=self._execute_with_result, args=(dp, dpc, dpp, dpm))
-        execute_thread.start_context = threading.current_thread().name # type: ignore
-        execute_thread.timed_out = False # type: ignore
-        execute_thread.start()
-        execute_thread.join(self._timeout)
-        execute_thread.timed_out = True # type: ignore
-
-        thread_alive = execute_thread.is_alive()
-        if thread_alive:
-            if thread_alive:
+        metrics.processing_counter.inc()
+        if self._timeout is None:
+            # Without a timeout there is nothing to wait for, so execute in the current thread
+            self._execute_with_result(dp, dpc, dpp, dpm)
+        else:
+            # Execute in the shared pool and stop waiting after the timeout
+            timed_out = threading.Event()
+            future = Module._get_executor().submit(self._execute_with_timeout, timed_out, threading.current_thread().name, dp, dpc, dpp, dpm)
+            done, _ = wait((future,), timeout=self._timeout)
+            timed_out.set()
+
+            if not done:
                 try:
                     # Raise a TimeoutError to stop the thread
                     raise TimeoutError(f"Execution of module {self._name} timed out after {self._timeout} seconds.")
@@ -131,36 +169,37 @@ class Module(ABC):
                     dpm.error = err
                     dp.errors.append(err)
 
-        if dpm.status == Status.RUNNING:
-            dpm.status = Status.SUCCESS
+        status = dpm.status
+        if status == Status.RUNNING:
+            status = Status.SUCCESS
+            dpm.status = status
 
-        end_time = time.time()
-        dpm.end_time = end_time
-        total_time = end_time - start_time
+        total_time = (time.perf_counter_ns() - start_counter) * 1e-9
+        dpm.end_time = start_time + total_time
         dpm.total_time = total_time
 
-        if dpm.status == Status.SUCCESS:
-            MODULE_SUCCESS_TIME.labels(pipeline_name=dp.pipeline_name, pipeline_id=dp.pipeline_id, pipeline_instance_id=dp.pipeline_instance_id, controller_name=dpc.controller_name, controller_id=dpc.controller_id, phase_name=dpp.phase_name, phase_id=dpp.phase_id, module_name=self._name, module_id=self._id).observe(total_time)
-            MODULE_OUTPUT_FLOWRATE.labels(pipeline_name=dp.pipeline_name, pipeline_id=dp.pipeline_id, pipeline_instance_id=dp.pipeline_instance_id, controller_name=dpc.controller_name, controller_id=dpc.controller_id, phase_name=dpp.phase_name, phase_id=dpp.phase_id, module_name=self._name, module_id=self._id).inc()
-        elif dpm.status == Status.EXIT:
-            MODULE_EXIT_TIME.labels(pipeline_name=dp.pipeline_name, pipeline_id=dp.pipeline_id, pipeline_instance_id=dp.pipeline_instance_id, controller_name=dpc.controller_name, controller_id=dpc.controller_id, phase_name=dpp.phase_name, phase_id=dpp.phase_id, module_name=self._name, module_id=self._id).observe(total_time)
-            MODULE_EXIT_FLOWRATE.labels(pipeline_name=dp.pipeline_name, pipeline_id=dp.pipeline_id, pipeline_instance_id=dp.pipeline_instance_id, controller_name=dpc.controller_name, controller_id=dpc.controller_id, phase_name=dpp.phase_name, phase_id=dpp.phase_id, module_name=self._name, module_id=self._id).inc()
-        elif dpm.status == Status.ERROR:
-            MODULE_ERROR_TIME.labels(pipeline_name=dp.pipeline_name, pipeline_id=dp.pipeline_id, pipeline_instance_id=dp.pipeline_instance_id, controller_name=dpc.controller_name, controller_id=dpc.controller_id, phase_name=dpp.phase_name, phase_id=dpp.phase_id, module_name=self._name, module_id=self._id).observe(total_time)
-            MODULE_ERROR_FLOWRATE.labels(pipeline_name=dp.pipeline_name, pipeline_id=dp.pipeline_id, pipeline_instance_id=dp.pipeline_instance_id, controller_name=dpc.controller_name, controller_id=dpc.controller_id, phase_name=dpp.phase_name, phase_id=dpp.phase_id, module_name=self._name, module_id=self._id).inc()
+        if status == Status.SUCCESS:
+            metrics.success_time.observe(total_time)
+            metrics.output_flowrate.inc()
+        elif status == Status.EXIT:
+            metrics.exit_time.observe(total_time)
+            metrics.exit_flowrate.inc()
+        elif status == Status.ERROR:
+            metrics.error_time.observe(total_time)
+            metrics.error_flowrate.inc()
         else:
             try:
-                raise ValueError(f"Invalid status {dpm.status} for module {self._name}")
+                raise ValueError(f"Invalid status {status} for module {self._name}")
             except ValueError as ve:
                 dpm.status = Status.ERROR
                 err = exception_to_error(ve)
                 dpm.error = err
                 dp.errors.append(err)
         
-        MODULE_PROCESSING_COUNTER.labels(pipeline_name=dp.pipeline_name, pipeline_id=dp.pipeline_id, pipeline_instance_id=dp.pipeline_instance_id, controller_name=dpc.controller_name, controller_id=dpc.controller_id, phase_name=dpp.phase_name, phase_id=dpp.phase_id, module_name=self._name, module_id=self._id).dec()
+        metrics.processing_counter.dec()
         
-        if self._use_mutex:
-            self._mutex.release()
+        if mutex is not None:
+            mutex.release()
             
         return dpm
 
@@ -168,6 +207,38 @@ class Module(ABC):
         
 
 
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        """
+        Returns the thread pool for modules with a timeout called from the current thread. Created on first use.
+        A module running in the pool of level n runs its nested modules in the pool of level n + 1. A pool full of
+        parents waiting for their nested modules can therefore never block those nested modules.
+        """
+        level = getattr(threading.current_thread(), 'module_executor_level', -1) + 1
+        executors = Module._executors
+        if level >= len(executors):
+            with Module._executor_lock:
+                while level >= len(executors):
+                    executors.append(ThreadPoolExecutor(
+                        max_workers=MODULE_EXECUTOR_MAX_WORKERS,
+                        thread_name_prefix=f"Module-{len(executors)}",
+                        initializer=_set_executor_level,
+                        initargs=(len(executors),),
+                    ))
+        return executors[level]
+
+    def _execute_with_timeout(self, timed_out: threading.Event, start_context: str, data: DataPackage, dpc: DataPackageController, dpp: DataPackagePhase, dpm: DataPackageModule) -> None:
+        """
+        Runs `_execute_with_result` in a pool thread. The pool threads are reused, so the context of the call is set for every task.
+        """
+        current_thread = threading.current_thread()
+        current_thread.start_context = start_context # type: ignore
+        current_thread.timed_out = timed_out # type: ignore
+        try:
+            self._execute_with_result(data, dpc, dpp, dpm)
+        finally:
+            current_thread.timed_out = None # type: ignore
+
     def _execute_with_result(self, data: DataPackage, dpc: DataPackageController, dpp: DataPackagePhase, dpm: DataPackageModule) -> None:
         """
         Helper method to execute the `execute` method and store the result in a container.
@@ -175,9 +246,8 @@ class Module(ABC):
         try:
             self.execute(data, dpc, dpp, dpm)
         except Exception as e:
-            current_thread = threading.current_thread()
-            if hasattr(current_thread, 'timed_out') and current_thread.timed_out:
-                pipeline_logger = PipelineLogger()
+            timed_out: Optional[threading.Event] = getattr(threading.current_thread(), 'timed_out', None)
+            if timed_out is not None and timed_out.is_set():
                 pipeline_logger.warning(f"Execution of module {self._name} was interrupted due to timeout.")
                 return
             dpm.status = Status.ERROR
@@ -212,13 +282,14 @@ class Module(ABC):
         # Store the copy in memo
         memo[id(self)] = copy_obj
         
-        # Deep copy all instance attributes
+        # Deep copy all instance attributes. Locks can't be copied, the copy gets its own.
         for k, v in self.__dict__.items():
-            setattr(copy_obj, k, copy.deepcopy(v, memo))
-        
-        # Ensure that the _locks attribute is copied correctly
-        if id(self) in self._locks:
-            copy_obj._locks[id(copy_obj)] = threading.RLock()
+            if k == '_mutex':
+                setattr(copy_obj, k, threading.Lock() if v is not None else None)
+            elif k == '_metrics':
+                setattr(copy_obj, k, {})
+            else:
+                setattr(copy_obj, k, copy.deepcopy(v, memo))
         
         return copy_obj
 
@@ -298,11 +369,13 @@ class CombinationModule(Module):
 class ExternalModule(Module):
     """
     Class for a module that runs on a different server. Using gRPC for communication.
+    Without a timeout in the options, the module waits at most response_timeout seconds for the server.
     """
-    def __init__(self, host: str, port: int, options: ModuleOptions = ModuleOptions(), name: str = ""):
+    def __init__(self, host: str, port: int, options: ModuleOptions = ModuleOptions(), name: str = "", response_timeout: float = EXTERNAL_MODULE_RESPONSE_TIMEOUT):
         super().__init__(options, name)
         self.host: str = host
         self.port: int = port
+        self.response_timeout: float = response_timeout
 
     def init_module(self) -> None:
         pass
@@ -319,25 +392,35 @@ class ExternalModule(Module):
 
     @final
     def execute(self, data: DataPackage, dpc: DataPackageController, dpp: DataPackagePhase, dpm: DataPackageModule) -> None:
-        address = f"{self.host}:{self.port}"
-        with grpc.insecure_channel(address) as channel:
-            stub = data_pb2_grpc.ModuleServiceStub(channel)
-            dp_grpc = data.to_grpc()
-            dpc_id = dpc.id
-            dpp_id = dpp.id
-            dpm_id = dpm.id
-            data_grpc = data_pb2.RequestDP(data_package=dp_grpc, data_package_controller_id=dpc_id, data_package_phase_id=dpp_id, data_package_module_id=dpm_id)
-            response = stub.run(data_grpc)
-            
-            
-            if response.error and response.error.ListFields():
-                error = Error()
-                error.set_from_grpc(response.error)
-                raise error.to_exception()
-            else:
-                sub_dpm_id = response.data_package_module_id
-                data.set_from_grpc(response.data_package)
-                sub_dpm = self._get_sub_module(dpm, sub_dpm_id)
-                if not sub_dpm:
-                    raise ValueError(f"Sub module with id {sub_dpm_id} not found in parent module.")
-                dpm.status = sub_dpm.status
\ No newline at end of file
+        dpc_id = dpc.id
+        dpp_id = dpp.id
+        dpm_id = dpm.id
+
+        data_grpc = data_pb2.RequestDP()
+        data._fill_grpc(data_grpc.data_package)
+        data_grpc.data_package_controller_id = dpc_id
+        data_grpc.data_package_phase_id = dpp_id
+        data_grpc.data_package_module_id = dpm_id
+
+        # Requests to the same server are collected and sent together over a shared stream. The wait ends
+        # with the module timeout, so a timed out call doesn't keep its thread blocked. A late response is dropped.
+        timeout = self._timeout if self._timeout is not None else self.response_timeout
+        future = get_request_batcher(self.host, self.port).submit(data_grpc)
+        try:
+            response = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            raise TimeoutError(f"No response from {self.host}:{self.port} after {timeout} seconds.") from None
+        finally:
+            future.cancel() # Does nothing if the response arrived, otherwise the stream forgets the request
+        
+        if response.HasField('error'):
+            error = Error()
+            error.set_from_grpc(response.error)
+            raise error.to_exception()
+        else:
+            sub_dpm_id = response.data_package_module_id
+            data.set_from_grpc(response.data_package)
+            sub_dpm = self._get_sub_module(dpm, sub_dpm_id)
+            if not sub_dpm:
+                raise ValueError(f"Sub module with id {sub_dpm_id} not found in parent module.")
+            dpm.status = sub_dpm.status
\ No newline at end of file
@@ -1,14 +1,17 @@
 
 
+import asyncio
 from collections import deque
-from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import Future
 from dataclasses import dataclass
+import itertools
 import time
 
-from .logger import PipelineLogger, exception_to_error, format_json
+from .executor import WorkStealingExecutor
+from .logger import exception_to_error, format_json, pipeline_logger
 from .module_classes import Module
 import threading
-from typing import Callable, Dict, Generic, List, Optional, Sequence, Set, Tuple, TypeVar, Union
+from typing import Callable, Deque, Dict, Generic, List, NamedTuple, Optional, Sequence, Set, Tuple, TypeVar, Union
 from enum import Enum
 import uuid
 from prometheus_client import Gauge, Summary, Counter
@@ -62,6 +65,58 @@ PHASE_ERROR_TIME = Summary("phase_error_time", "The time it took for the phase t
 
 PHASE_PROCESSING_COUNTER = Gauge("phase_processing_counter", "The number of data packages being processed", ["pipeline_name", "pipeline_id", "pipeline_instance_id", "controller_name", "controller_id", "phase_name", "phase_id"])
 
+class PipelineMetrics(NamedTuple):
+    """
+    Metrics of one pipeline instance bound to its labels.
+    """
+    input_flowrate: Counter
+    output_flowrate: Counter
+    exit_flowrate: Counter
+    overflow_flowrate: Counter
+    outdated_flowrate: Counter
+    error_flowrate: Counter
+    success_time: Summary
+    exit_time: Summary
+    overflow_time: Summary
+    outdated_time: Summary
+    error_time: Summary
+    processing_counter: Gauge
+
+class ControllerMetrics(NamedTuple):
+    """
+    Metrics of one controller bound to the labels of a pipeline instance.
+    """
+    input_flowrate: Counter
+    output_flowrate: Counter
+    exit_flowrate: Counter
+    overflow_flowrate: Counter
+    outdated_flowrate: Counter
+    error_flowrate: Counter
+    input_waiting_time: Summary
+    output_waiting_time: Summary
+    success_time: Summary
+    exit_time: Summary
+    overflow_time: Summary
+    outdated_time: Summary
+    error_time: Summary
+    input_waiting_counter: Gauge
+    output_waiting_counter: Gauge
+    processing_counter: Gauge
+
+class PhaseMetrics(NamedTuple):
+    """
+    Metrics of one phase bound to the labels of a pipeline instance and controller.
+    """
+    input_flowrate: Counter
+    output_flowrate: Counter
+    exit_flowrate: Counter
+    error_flowrate: Counter
+    success_time: Summary
+    exit_time: Summary
+    error_time: Summary
+    processing_counter: Gauge
+
+
 class ControllerMode(Enum):
     """
     Enum to define different modes of pipeline execution.
@@ -92,63 +147,78 @@ class PipelinePhase:
     def __init__(self, name: str, modules: List[Module]) -> None:
         self._id: str = f"PP-{uuid.uuid4()}"
         self._name: str = name
-        self._modules: List[Module] = modules
+        self._modules: Tuple[Module, ...] = tuple(modules) # Never mutated, so execute can read it without the lock
+        self._metrics: Dict[Tuple[str, ...], PhaseMetrics] = {} # Bound metrics per label values, see _get_metrics
 
         self._lock = threading.Lock()
 
+    def _get_metrics(self, dp: DataPackage, dpc: DataPackageController) -> PhaseMetrics:
+        """
+        Returns the metrics of this phase bound to the labels of the data package. Bound once per pipeline instance and controller.
+        """
+        key = (dp.pipeline_name, dp.pipeline_id, dp.pipeline_instance_id, dpc.controller_name, dpc.controller_id)
+        metrics = self._metrics.get(key)
+        if metrics is None:
+            labels = key + (self._name, self._id)
+            metrics = PhaseMetrics(
+                input_flowrate=PHASE_INPUT_FLOWRATE.labels(*labels),
+                output_flowrate=PHASE_OUTPUT_FLOWRATE.labels(*labels),
+                exit_flowrate=PHASE_EXIT_FLOWRATE.labels(*labels),
+                error_flowrate=PHASE_ERROR_FLOWRATE.labels(*labels),
+                success_time=PHASE_SUCCESS_TIME.labels(*labels),
+                exit_time=PHASE_EXIT_TIME.labels(*labels),
+                error_time=PHASE_ERROR_TIME.labels(*labels),
+                processing_counter=PHASE_PROCESSING_COUNTER.labels(*labels),
+            )
+            self._metrics[key] = metrics
+        return metrics
+
     def init_modules(self) -> None:
         for module in self._modules:
             module.init_module()
 
     def execute(self, data_package: DataPackage, data_package_controller: DataPackageController) -> DataPackagePhase:
         start_time = time.time()
-        with self._lock:
-            PHASE_INPUT_FLOWRATE.labels(data_package.pipeline_name, data_package.pipeline_id, data_package.pipeline_instance_id, data_package_controller.controller_name, data_package_controller.controller_id, self._name, self._id).inc()
-            PHASE_PROCESSING_COUNTER.labels(data_package.pipeline_name, data_package.pipeline_id, data_package.pipeline_instance_id, data_package_controller.controller_name, data_package_controller.controller_id, self._name, self._id).inc()
-        
-        dp_phase = DataPackagePhase()
-        with self._lock:
-            dp_phase.phase_id=self._id
-            dp_phase.phase_name=self._name
-        dp_phase.status = Status.RUNNING
-        dp_phase.start_time=start_time
-            
+        # id and name never change after __init__, so one pass without taking the lock is enough
+        metrics = self._get_metrics(data_package, data_package_controller)
+        metrics.input_flowrate.inc()
+        metrics.processing_counter.inc()
+
+        dp_phase = DataPackagePhase(_phase_id=self._id, _phase_name=self._name, _status=Status.RUNNING, _start_time=start_time)
+
         data_package_controller.phases.append(dp_phase)
 
+        status = Status.SUCCESS
         for module in self._modules:
             dpm = module.run(dp=data_package, dpc=data_package_controller, dpp=dp_phase)
             if not dpm.status == Status.SUCCESS:
-                dp_phase.status = dpm.status
+                status = dpm.status
                 break
 
-        if dp_phase.status == Status.RUNNING:
-            dp_phase.status = Status.SUCCESS
-
         ent_time = time.time()
-        dp_phase.end_time = ent_time
         total_time = ent_time - start_time
+
+        if status == Status.SUCCESS:
+            metrics.success_time.observe(total_time)
+            metrics.output_flowrate.inc()
+        elif status == Status.EXIT:
+            metrics.exit_time.observe(total_time)
+            metrics.exit_flowrate.inc()
+        elif status == Status.ERROR:
+            metrics.error_time.observe(total_time)
+            metrics.error_flowrate.inc()
+        else:
+            try:
+                raise ValueError("Status not recognized.")
+            except ValueError as e:
+                status = Status.ERROR
+                data_package.errors.append(exception_to_error(e))
+
+        dp_phase.status = status
+        dp_phase.end_time = ent_time
         dp_phase.total_time = total_time
+        metrics.processing_counter.dec()
 
-        with self._lock:
-            if dp_phase.status == Status.SUCCESS:
-                PHASE_SUCCESS_TIME.labels(data_package.pipeline_name, data_package.pipeline_id, data_package.pipeline_instance_id, data_package_controller.controller_name, data_package_controller.controller_id, self._name, self._id).observe(total_time)
-                PHASE_OUTPUT_FLOWRATE.labels(data_package.pipeline_name, data_package.pipeline_id, data_package.pipeline_instance_id, data_package_controller.controller_name, data_package_controller.controller_id, self._name, self._id).inc()
-            elif dp_phase.status == Status.EXIT:
-                PHASE_EXIT_TIME.labels(data_package.pipeline_name, data_package.pipeline_id, data_package.pipeline_instance_id, data_package_controller.controller_name, data_package_controller.controller_id, self._name, self._id).observe(total_time)
-                PHASE_EXIT_FLOWRATE.labels(data_package.pipeline_name, data_package.pipeline_id, data_package.pipeline_instance_id, data_package_controller.controller_name, data_package_controller.controller_id, self._name, self._id).inc()
-            elif dp_phase.status == Status.ERROR:
-                PHASE_ERROR_TIME.labels(data_package.pipeline_name, data_package.pipeline_id, data_package.pipeline_instance_id, data_package_controller.controller_name, data_package_controller.controller_id, self._name, self._id).observe(total_time)
-                PHASE_ERROR_FLOWRATE.labels(data_package.pipeline_name, data_package.pipeline_id, data_package.pipeline_instance_id, data_package_controller.controller_name, data_package_controller.controller_id, self._name, self._id).inc
-            else:
-                try:
-                    raise ValueError("Status not recognized.")
-                except ValueError as e:
-                    dp_phase.status = Status.ERROR
-                    data_package.errors.append(exception_to_error(e))
-                    
-            
-            PHASE_PROCESSING_COUNTER.labels(data_package.pipeline_name, data_package.pipeline_id, data_package.pipeline_instance_id, data_package_controller.controller_name, data_package_controller.controller_id, self._name, self._id).dec()
-            
         return dp_phase
 
     def __deepcopy__(self, memo: Dict) -> 'PipelinePhase':
@@ -159,17 +229,34 @@ class PipelinePhase:
         copied_phase._id = self._id
         return copied_phase
 
+class ControllerCallbacks(NamedTuple):
+    """
+    Callbacks of one PipelineController.execute call. Kept with each data package, because a worker also
+    finishes data packages that were added by other execute calls.
+    """
+    callback: Callable[[DataPackage], None]
+    exit_callback: Callable[[DataPackage], None]
+    overflow_callback: Callable[[DataPackage], None]
+    outdated_callback: Callable[[DataPackage], None]
+    error_callback: Callable[[DataPackage], None]
+
+# A data package in the OrderTracker, together with the callbacks of the execute call that added it
+OrderEntry = Tuple[DataPackage, DataPackageController, ControllerCallbacks]
+
 class OrderTracker:
     def __init__(self) -> None:
+        self._sequence_numbers = itertools.count() # next() is atomic in CPython, so numbers can be handed out without a lock
         self._next_sequence_number = 0
         self._last_finished_sequence_number = -1
-        self._data_packages: Dict[int, Optional[Tuple[DataPackage, DataPackageController]]] = {}
-        self._finished_data_packages: Dict[int, Optional[Tuple[DataPackage, DataPackageController]]] = {}
+        self._data_packages: Dict[int, OrderEntry] = {}
+        self._finished_data_packages: Dict[int, Optional[OrderEntry]] = {}
 
         self._lock = threading.Lock()
 
         self.instance_lock = threading.Lock()
 
+    # The getters don't lock. The sequence numbers are ints that are replaced with a single assignment,
+    # so readers always see either the old or the new value.
     def get_last_finished_sequence_number(self) -> int:
         """
         Returns the last finished sequence number.
@@ -177,8 +264,10 @@ class OrderTracker:
         return self._last_finished_sequence_number
     
     def get_next_sequence_number(self) -> int:
-        with self._lock:
-            return self._next_sequence_number
+        """
+        Returns the sequence number the next data package will get. It only lags behind while another thread is inside add_data.
+        """
+        return self._next_sequence_number
 
     def set_last_finished_sequence_number(self, sequence_number: int) -> None:
         """
@@ -190,10 +279,18 @@ class OrderTracker:
             raise ValueError("Sequence number cannot be greater or equal than the next sequence number or smaller than the last finished sequence number.")
         self._last_finished_sequence_number = sequence_number
 
-    def add_data(self, dp: DataPackage, dpc: DataPackageController) -> None:
+    def add_data(self, dp: DataPackage, dpc: DataPackageController, callbacks: ControllerCallbacks) -> int:
+        """
+        Adds a data package and returns its sequence number. The callbacks are returned with it by pop_finished_data_packages.
+        Relies on the GIL: next() on itertools.count and setting a new dict key are atomic.
+        Only the compare and update of the next sequence number needs the lock, so it never moves backwards.
+        """
+        sequence_number = next(self._sequence_numbers)
+        self._data_packages[sequence_number] = (dp, dpc, callbacks)
         with self._lock:
-            self._data_packages[self._next_sequence_number] = (dp, dpc)
-            self._next_sequence_number += 1
+            if sequence_number >= self._next_sequence_number:
+                self._next_sequence_number = sequence_number + 1
+        return sequence_number
     
     def remove_data(self, sequence_number: int) -> None:
         """
@@ -217,12 +314,11 @@ class OrderTracker:
         """
         with self._lock:
             if sequence_number in self._data_packages:
-                dp_and_dpc_or_none = self._data_packages.pop(sequence_number)
-                self._finished_data_packages[sequence_number] = dp_and_dpc_or_none
+                self._finished_data_packages[sequence_number] = self._data_packages.pop(sequence_number)
             else:
                 raise ValueError("Sequence number not found in data packages.")
 
-    def pop_finished_data_packages(self, mode: ControllerMode) -> Tuple[List[Tuple[DataPackage, DataPackageController]], List[Tuple[DataPackage, DataPackageController]]]:
+    def pop_finished_data_packages(self, mode: ControllerMode) -> Tuple[List[OrderEntry], List[OrderEntry]]:
         """
         NO_ORDER:
             Example:
@@ -244,40 +340,40 @@ class OrderTracker:
                 Queue left: []
         """
         with self._lock:
-            finished_data_packages: List[Tuple[DataPackage, DataPackageController]] = []
-            outdated_data_packages: List[Tuple[DataPackage, DataPackageController]] = []
+            finished_data_packages: List[OrderEntry] = []
+            outdated_data_packages: List[OrderEntry] = []
 
             if (mode == ControllerMode.NO_ORDER):
-                for sequence_number, dp_and_dpc in self._finished_data_packages.items():
-                    if dp_and_dpc is None:
+                for sequence_number, entry in self._finished_data_packages.items():
+                    if entry is None:
                         continue
-                    finished_data_packages.append(dp_and_dpc)
+                    finished_data_packages.append(entry)
                 self._finished_data_packages = {}
                     
             elif mode == ControllerMode.ORDER_BY_SEQUENCE or mode == ControllerMode.NOT_PARALLEL:
                 current_sequence = self._last_finished_sequence_number + 1
 
                 while current_sequence in self._finished_data_packages:
-                    dp_and_dpc = self._finished_data_packages.pop(current_sequence)
+                    entry = self._finished_data_packages.pop(current_sequence)
                     self._last_finished_sequence_number = current_sequence
                     current_sequence = current_sequence + 1
-                    if dp_and_dpc is None:
+                    if entry is None:
                         continue
-                    finished_data_packages.append(dp_and_dpc)
+                    finished_data_packages.append(entry)
 
             elif mode == ControllerMode.FIRST_WINS:
                 # find each dp which has a bigger sequence number than the last finished sequence number
                 last_sequence_number = self._last_finished_sequence_number + 1
-                for sequence_number, dp_and_dpc in self._finished_data_packages.items():
-                    if dp_and_dpc is None:
+                for sequence_number, entry in self._finished_data_packages.items():
+                    if entry is None:
                         continue
                     
                     if sequence_number >= last_sequence_number:
                         self._last_finished_sequence_number = sequence_number
                         last_sequence_number = sequence_number + 1
-                        finished_data_packages.append(dp_and_dpc)
+                        finished_data_packages.append(entry)
                     else:
-                        outdated_data_packages.append(dp_and_dpc)
+                        outdated_data_packages.append(entry)
 
                 # remove the data packages from the finished queue
                 self._finished_data_packages.clear()
@@ -290,12 +386,13 @@ class QueueData:
     dp_phase_con: DataPackageController
     data_package: DataPackage
     start_time: float
+    callbacks: ControllerCallbacks
 
 class PipelineController:
     def __init__(self, name: str, phases: List[PipelinePhase], max_workers: int = 1, queue_size: int = -1, mode: ControllerMode = ControllerMode.NOT_PARALLEL) -> None:
         self._id: str = f"C-{uuid.uuid4()}"
         self._name: str = name
-        self._phases: List[PipelinePhase] = phases
+        self._phases: Tuple[PipelinePhase, ...] = tuple(phases) # Never mutated, so workers can read it without the lock
         self._mode: ControllerMode = mode
 
         if queue_size < 0:
@@ -306,7 +403,7 @@ class PipelineController:
 
         self._max_workers = max_workers
 
-        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._executor = WorkStealingExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-worker")
 
         self._order_tracker = OrderTracker()
 
@@ -318,12 +415,70 @@ class PipelineController:
 
         self._current_thread: Set[str] = set()
 
+        self._metrics: Dict[Tuple[str, ...], ControllerMetrics] = {} # Bound metrics per label values, see _get_metrics
+
+        # Finished and outdated data packages are queued in output order under the order tracker lock
+        # and handed to the callbacks after the lock is released, by one thread at a time.
+        self._output_queue: Deque[Tuple[Callable[[DataPackage], None], DataPackage]] = deque()
+        self._output_lock = threading.Lock()
+        self._output_draining = False
+
         self._lock = threading.Lock()
 
     def init_phases(self) -> None:
         for phase in self._phases:
             phase.init_modules()
 
+    def _get_metrics(self, dp: DataPackage) -> ControllerMetrics:
+        """
+        Returns the metrics of this controller bound to the labels of the data package. Bound once per pipeline instance.
+        """
+        key = (dp.pipeline_name, dp.pipeline_id, dp.pipeline_instance_id)
+        metrics = self._metrics.get(key)
+        if metrics is None:
+            labels = key + (self._name, self._id)
+            metrics = ControllerMetrics(
+                input_flowrate=CONTROLLER_INPUT_FLOWRATE.labels(*labels),
+                output_flowrate=CONTROLLER_OUTPUT_FLOWRATE.labels(*labels),
+                exit_flowrate=CONTROLLER_EXIT_FLOWRATE.labels(*labels),
+                overflow_flowrate=CONTROLLER_OVERFLOW_FLOWRATE.labels(*labels),
+                outdated_flowrate=CONTROLLER_OUTDATED_FLOWRATE.labels(*labels),
+                error_flowrate=CONTROLLER_ERROR_FLOWRATE.labels(*labels),
+                input_waiting_time=CONTROLLER_INPUT_WAITING_TIME.labels(*labels),
+                output_waiting_time=CONTROLLER_OUTPUT_WAITING_TIME.labels(*labels),
+                success_time=CONTROLLER_SUCCESS_TIME.labels(*labels),
+                exit_time=CONTROLLER_EXIT_TIME.labels(*labels),
+                overflow_time=CONTROLLER_OVERFLOW_TIME.labels(*labels),
+                outdated_time=CONTROLLER_OUTDATED_TIME.labels(*labels),
+                error_time=CONTROLLER_ERROR_TIME.labels(*labels),
+                input_waiting_counter=CONTROLLER_INPUT_WAITING_COUNTER.labels(*labels),
+                output_waiting_counter=CONTROLLER_OUTPUT_WAITING_COUNTER.labels(*labels),
+                processing_counter=CONTROLLER_PROCESSING_COUNTER.labels(*labels),
+            )
+            self._metrics[key] = metrics
+        return metrics
+
+    def _drain_output_queue(self) -> None:
+        """
+        Calls the callbacks of the queued output in order. Returns at once if another thread is already draining,
+        that thread will also pick up the output queued by this one.
+        """
+        with self._output_lock:
+            if self._output_draining:
+                return
+            self._output_draining = True
+
+        while True:
+            with self._output_lock:
+                if not self._output_queue:
+                    self._output_draining = False
+                    return
+                callback, data_package = self._output_queue.popleft()
+            try:
+                callback(data_package)
+            except Exception as e:
+                pipeline_logger.critical(f"Critical error: {format_json(str(exception_to_error(e)))}")
+
     def _get_current_working_threads(self) -> List[str]:
         """Returns a list of names of the currently working threads."""
         # Return a copy of the active threads to avoid modifying the original set
@@ -332,22 +487,22 @@ class PipelineController:
 
     def execute(self, data_package: DataPackage, callback: Callable[[DataPackage], None], exit_callback: Callable[[DataPackage], None], overflow_callback: Callable[[DataPackage], None], outdated_callback: Callable[[DataPackage], None], error_callback: Callable[[DataPackage], None]) -> None:
         start_time = time.time()
-        with self._lock:
-            CONTROLLER_INPUT_FLOWRATE.labels(data_package.pipeline_name, data_package.pipeline_id, data_package.pipeline_instance_id, self._name, self._id).inc()
-
-        dp_phase_con = DataPackageController()
-        with self._lock:
-            dp_phase_con.controller_id=self._id
-            dp_phase_con.controller_name=self._name
-            dp_phase_con.mode=controller_mode_to_str(self._mode)
-            dp_phase_con.workers=self._max_workers
-            dp_phase_con.sequence_number=self._order_tracker.get_next_sequence_number()
-        dp_phase_con.status = Status.RUNNING
-        dp_phase_con.start_time=start_time
+        self._get_metrics(data_package).input_flowrate.inc()
+
+        dp_phase_con = DataPackageController(
+            _controller_id=self._id,
+            _controller_name=self._name,
+            _mode=controller_mode_to_str(self._mode),
+            _workers=self._max_workers,
+            _status=Status.RUNNING,
+            _start_time=start_time,
+        )
 
         data_package.controllers.append(dp_phase_con)
 
-        self._order_tracker.add_data(data_package, dp_phase_con)
+        # The sequence number is taken when the data is added, so two data packages can't get the same number
+        callbacks = ControllerCallbacks(callback, exit_callback, overflow_callback, outdated_callback, error_callback)
+        dp_phase_con.sequence_number=self._order_tracker.add_data(data_package, dp_phase_con, callbacks)
         
         start_context = threading.current_thread().name
 
@@ -367,9 +522,9 @@ class PipelineController:
                     if queue_data is None:
                         continue
 
-                    with self._lock:
-                        CONTROLLER_INPUT_WAITING_COUNTER.labels(queue_data.data_package.pipeline_name, queue_data.data_package.pipeline_id, queue_data.data_package.pipeline_instance_id, self._name, self._id).dec()
-                        CONTROLLER_PROCESSING_COUNTER.labels(queue_data.data_package.pipeline_name, queue_data.data_package.pipeline_id, queue_data.data_package.pipeline_instance_id, self._name, self._id).inc()
+                    metrics = self._get_metrics(queue_data.data_package)
+                    metrics.input_waiting_counter.dec()
+                    metrics.processing_counter.inc()
 
 
                     start_context = queue_data.start_context
@@ -384,14 +539,9 @@ class PipelineController:
                         dp_phase_con.status = Status.RUNNING
                         waiting_time = time.time() - start_time
                         dp_phase_con.input_waiting_time = waiting_time
-                        with self._lock:
-                            CONTROLLER_INPUT_WAITING_TIME.labels(data_package.pipeline_name, data_package.pipeline_id, data_package.pipeline_instance_id, self._name, self._id).observe(waiting_time)
-
-                        temp_phases = []
-                        with self._lock:
-                            temp_phases = self._phases.copy()
+                        self._get_metrics(data_package).input_waiting_time.observe(waiting_time)
 
-                        for phase in temp_phases:
+                        for phase in self._phases:
                             dpp = phase.execute(data_package, dp_phase_con)
                             if not dpp.status == Status.SUCCESS:
                                 dp_phase_con.status = dpp.status
@@ -410,10 +560,11 @@ class PipelineController:
                             total_time = end_time - dp_phase_con.start_time
                             dp_phase_con.end_time = end_time
                             dp_phase_con.total_time = total_time
-                            CONTROLLER_EXIT_TIME.labels(data_package.pipeline_name, data_package.pipeline_id, data_package.pipeline_instance_id, self._name, self._id).observe(total_time)
-                            CONTROLLER_EXIT_FLOWRATE.labels(data_package.pipeline_name, data_package.pipeline_id, data_package.pipeline_instance_id, self._name, self._id).inc()
-                            CONTROLLER_PROCESSING_COUNTER.labels(data_package.pipeline_name, data_package.pipeline_id, data_package.pipeline_instance_id, self._name, self._id).dec()
-                        exit_callback(data_package)
+                            metrics = self._get_metrics(data_package)
+                            metrics.exit_time.observe(total_time)
+                            metrics.exit_flowrate.inc()
+                            metrics.processing_counter.dec()
+                        queue_data.callbacks.exit_callback(data_package)
                         continue
                     elif dp_phase_con.status == Status.ERROR:
                         with self._order_tracker.instance_lock:
@@ -422,10 +573,11 @@ class PipelineController:
                             total_time = end_time - dp_phase_con.start_time
                             dp_phase_con.end_time = end_time
                             dp_phase_con.total_time = total_time
-                            CONTROLLER_ERROR_TIME.labels(data_package.pipeline_name, data_package.pipeline_id, data_package.pipeline_instance_id, self._name, self._id).observe(total_time)
-                            CONTROLLER_ERROR_FLOWRATE.labels(data_package.pipeline_name, data_package.pipeline_id, data_package.pipeline_instance_id, self._name, self._id).inc()
-                            CONTROLLER_PROCESSING_COUNTER.labels(data_package.pipeline_name, data_package.pipeline_id, data_package.pipeline_instance_id, self._name, self._id).dec()
-                        error_callback(data_package)
+                            metrics = self._get_metrics(data_package)
+                            metrics.error_time.observe(total_time)
+                            metrics.error_flowrate.inc()
+                            metrics.processing_counter.dec()
+                        queue_data.callbacks.error_callback(data_package)
                         continue
                     else:
                         try:
@@ -435,13 +587,13 @@ class PipelineController:
                             data_package.errors.append(exception_to_error(e))
 
                     dp_phase_con.end_time = time.time() # This will set the end time temporarily (bad code). It will be overriden in the next block.
-                    CONTROLLER_OUTPUT_WAITING_COUNTER.labels(data_package.pipeline_name, data_package.pipeline_id, data_package.pipeline_instance_id, self._name, self._id).inc()
+                    self._get_metrics(data_package).output_waiting_counter.inc()
                     with self._order_tracker.instance_lock:
                         
                         self._order_tracker.push_finished_data_package(dp_phase_con.sequence_number)
                         finished_data_packages, outdated_data_packages = self._order_tracker.pop_finished_data_packages(self._mode)
                         
-                        for (fdp, fdpc) in finished_data_packages:
+                        for (fdp, fdpc, fcallbacks) in finished_data_packages:
                             
                             if fdpc.status == Status.WAITING_OUTPUT:
                                 fdpc.status = Status.SUCCESS
@@ -458,19 +610,18 @@ class PipelineController:
                             fdpc.output_waiting_time = output_waiting_time
                             fdpc.end_time = end_time # This is where the end time will be overriden. (bad code)
                             fdpc.total_time = total_time
-                            CONTROLLER_OUTPUT_WAITING_TIME.labels(fdp.pipeline_name, fdp.pipeline_id, fdp.pipeline_instance_id, self._name, self._id).observe(output_waiting_time)
-                            CONTROLLER_OUTPUT_WAITING_COUNTER.labels(fdp.pipeline_name, fdp.pipeline_id, fdp.pipeline_instance_id, self._name, self._id).dec()
+                            metrics = self._get_metrics(fdp)
+                            metrics.output_waiting_time.observe(output_waiting_time)
+                            metrics.output_waiting_counter.dec()
                             
-                            with self._lock:
-                                if fdpc.status == Status.SUCCESS:
-                                    CONTROLLER_SUCCESS_TIME.labels(fdp.pipeline_name, fdp.pipeline_id, fdp.pipeline_instance_id, self._name, self._id).observe(total_time)
-                                    CONTROLLER_OUTPUT_FLOWRATE.labels(fdp.pipeline_name, fdp.pipeline_id, fdp.pipeline_instance_id, self._name, self._id).inc()
-
-                                CONTROLLER_PROCESSING_COUNTER.labels(fdp.pipeline_name, fdp.pipeline_id, fdp.pipeline_instance_id, self._name, self._id).dec()
+                            if fdpc.status == Status.SUCCESS:
+                                metrics.success_time.observe(total_time)
+                                metrics.output_flowrate.inc()
+                            metrics.processing_counter.dec()
                             
-                            callback(fdp)
+                            self._output_queue.append((fcallbacks.callback, fdp))
                             
-                        for (odp, odpc) in outdated_data_packages:
+                        for (odp, odpc, ocallbacks) in outdated_data_packages:
                             if odpc.status == Status.WAITING_OUTPUT:
                                 odpc.status = Status.OUTDATED
                             else:
@@ -487,14 +638,16 @@ class PipelineController:
                             odpc.total_time = total_time
                             odpc.output_waiting_time = output_waiting_time
                             
-                            CONTROLLER_OUTDATED_TIME.labels(odp.pipeline_name, odp.pipeline_id, odp.pipeline_instance_id, self._name, self._id).observe(total_time)
-                            CONTROLLER_OUTDATED_FLOWRATE.labels(odp.pipeline_name, odp.pipeline_id, odp.pipeline_instance_id, self._name, self._id).inc()
-                            CONTROLLER_PROCESSING_COUNTER.labels(odp.pipeline_name, odp.pipeline_id, odp.pipeline_instance_id, self._name, self._id).dec()
-                            
-                            outdated_callback(odp)
+                            metrics = self._get_metrics(odp)
+                            metrics.outdated_time.observe(total_time)
+                            metrics.outdated_flowrate.inc()
+                            metrics.processing_counter.dec()
                             
+                            self._output_queue.append((ocallbacks.outdated_callback, odp))
+
+                    self._drain_output_queue()
+
             except Exception as e:
-                pipeline_logger = PipelineLogger()
                 pipeline_logger.critical(f"Critical error: {format_json(str(exception_to_error(e)))}")
                 
             with self._lock:
@@ -506,17 +659,16 @@ class PipelineController:
             new_value_overflow: bool = False
             worker_free = len(self._get_current_working_threads()) < self._max_workers
             if not worker_free and self._queue_size == 0:
-                popped_value = QueueData(start_context, dp_phase_con, data_package, start_time)
+                popped_value = QueueData(start_context, dp_phase_con, data_package, start_time, callbacks)
                 new_value_overflow = True
             elif len(self._dp_queue) == self._dp_queue.maxlen:
                 popped_value = self._dp_queue[0]
 
-            with self._lock:
-                CONTROLLER_INPUT_WAITING_COUNTER.labels(data_package.pipeline_name, data_package.pipeline_id, data_package.pipeline_instance_id, self._name, self._id).inc()
+            self._get_metrics(data_package).input_waiting_counter.inc()
             
             dp_phase_con.status = Status.WAITING
             if not new_value_overflow:
-                self._dp_queue.append(QueueData(start_context, dp_phase_con, data_package, start_time))
+                self._dp_queue.append(QueueData(start_context, dp_phase_con, data_package, start_time, callbacks))
 
             if popped_value:
                 with self._order_tracker.instance_lock:
@@ -528,15 +680,24 @@ class PipelineController:
         if popped_value:
             dp: DataPackage = popped_value.data_package
             popped_value.dp_phase_con.status = Status.OVERFLOW
-            with self._lock:
-                CONTROLLER_OVERFLOW_TIME.labels(dp.pipeline_name, dp.pipeline_id, dp.pipeline_instance_id, self._name, self._id).observe(time.time() - start_time)
-                CONTROLLER_OVERFLOW_FLOWRATE.labels(dp.pipeline_name, dp.pipeline_id, dp.pipeline_instance_id, self._name, self._id).inc()
-                CONTROLLER_INPUT_WAITING_COUNTER.labels(dp.pipeline_name, dp.pipeline_id, dp.pipeline_instance_id, self._name, self._id).dec()
-            overflow_callback(dp)
+            metrics = self._get_metrics(dp)
+            metrics.overflow_time.observe(time.time() - start_time)
+            metrics.overflow_flowrate.inc()
+            metrics.input_waiting_counter.dec()
+            popped_value.callbacks.overflow_callback(dp)
         
 
 
         
+    def shutdown(self, wait: bool = False) -> None:
+        """
+        Stops the worker threads of this controller once the queued data packages are processed.
+        The controller can't execute new data packages afterwards.
+        Args:
+            wait (bool): block until the workers have exited
+        """
+        self._executor.shutdown(wait=wait)
+
     def __deepcopy__(self, memo: Dict) -> 'PipelineController':
         copied_controller = PipelineController(
             name=self._name,
@@ -560,18 +721,44 @@ class PipelineInstance:
     def __init__(self) -> None:
         self._id: str = f"PI-{uuid.uuid4()}"
         self._controller_queue: Dict[str, List[PipelineController]] = {}
+        self._metrics: Dict[Tuple[str, ...], PipelineMetrics] = {} # Bound metrics per label values, see _get_metrics
 
         self._lock = threading.Lock()
 
-    def execute(self, controllers: List[PipelineController], dp: DataPackage, callback: Callable[[DataPackage], None], exit_callback: Optional[Callable[[DataPackage], None]] = None, overflow_callback: Optional[Callable[[DataPackage], None]] = None, outdated_callback: Optional[Callable[[DataPackage], None]] = None, error_callback: Union[Callable[[DataPackage], None], None] = None) -> None:      
-        with self._lock:
-            PIPELINE_INPUT_FLOWRATE.labels(dp.pipeline_name, dp.pipeline_id, self._id).inc()
-            PIPELINE_PROCESSING_COUNTER.labels(dp.pipeline_name, dp.pipeline_id, self._id).inc()
+    def _get_metrics(self, dp: DataPackage) -> PipelineMetrics:
+        """
+        Returns the metrics of this instance bound to the labels of the data package. Bound once per pipeline.
+        """
+        key = (dp.pipeline_name, dp.pipeline_id)
+        metrics = self._metrics.get(key)
+        if metrics is None:
+            labels = key + (self._id,)
+            metrics = PipelineMetrics(
+                input_flowrate=PIPELINE_INPUT_FLOWRATE.labels(*labels),
+                output_flowrate=PIPELINE_OUTPUT_FLOWRATE.labels(*labels),
+                exit_flowrate=PIPELINE_EXIT_FLOWRATE.labels(*labels),
+                overflow_flowrate=PIPELINE_OVERFLOW_FLOWRATE.labels(*labels),
+                outdated_flowrate=PIPELINE_OUTDATED_FLOWRATE.labels(*labels),
+                error_flowrate=PIPELINE_ERROR_FLOWRATE.labels(*labels),
+                success_time=PIPELINE_SUCCESS_TIME.labels(*labels),
+                exit_time=PIPELINE_EXIT_TIME.labels(*labels),
+                overflow_time=PIPELINE_OVERFLOW_TIME.labels(*labels),
+                outdated_time=PIPELINE_OUTDATED_TIME.labels(*labels),
+                error_time=PIPELINE_ERROR_TIME.labels(*labels),
+                processing_counter=PIPELINE_PROCESSING_COUNTER.labels(*labels),
+            )
+            self._metrics[key] = metrics
+        return metrics
+
+    def execute(self, controllers: Sequence[PipelineController], dp: DataPackage, callback: Callable[[DataPackage], None], exit_callback: Optional[Callable[[DataPackage], None]] = None, overflow_callback: Optional[Callable[[DataPackage], None]] = None, outdated_callback: Optional[Callable[[DataPackage], None]] = None, error_callback: Union[Callable[[DataPackage], None], None] = None) -> None:      
+        metrics = self._get_metrics(dp)
+        metrics.input_flowrate.inc()
+        metrics.processing_counter.inc()
         
         with self._lock:
             dp.pipeline_instance_id = self._id
 
-        self._controller_queue[dp.id] = controllers.copy()
+        self._controller_queue[dp.id] = list(controllers)
         
         def end_dp(dp: DataPackage) -> None:
             del self._controller_queue[dp.id]
@@ -579,25 +766,24 @@ class PipelineInstance:
             dp.end_time = end_time
             total_time = end_time - dp.start_time
             dp.total_time = total_time
-            with self._lock:
-                PIPELINE_PROCESSING_COUNTER.labels(dp.pipeline_name, dp.pipeline_id, self._id).dec()
+            self._get_metrics(dp).processing_counter.dec()
         
         def new_success_callback(dp: DataPackage) -> None:
             nonlocal callback
             end_dp(dp)
             dp.status = Status.SUCCESS
-            with self._lock:
-                PIPELINE_SUCCESS_TIME.labels(dp.pipeline_name, dp.pipeline_id, self._id).observe(dp.total_time)
-                PIPELINE_OUTPUT_FLOWRATE.labels(dp.pipeline_name, dp.pipeline_id, self._id).inc()
+            metrics = self._get_metrics(dp)
+            metrics.success_time.observe(dp.total_time)
+            metrics.output_flowrate.inc()
             callback(dp)
         
         def new_exit_callback(dp: DataPackage) -> None:
             nonlocal exit_callback
             end_dp(dp)
             dp.status = Status.EXIT
-            with self._lock:
-                PIPELINE_EXIT_TIME.labels(dp.pipeline_name, dp.pipeline_id, self._id).observe(dp.total_time)
-                PIPELINE_EXIT_FLOWRATE.labels(dp.pipeline_name, dp.pipeline_id, self._id).inc()
+            metrics = self._get_metrics(dp)
+            metrics.exit_time.observe(dp.total_time)
+            metrics.exit_flowrate.inc()
             if exit_callback:
                 exit_callback(dp)
         
@@ -605,9 +791,9 @@ class PipelineInstance:
             nonlocal overflow_callback
             end_dp(dp)
             dp.status = Status.OVERFLOW
-            with self._lock:
-                PIPELINE_OVERFLOW_TIME.labels(dp.pipeline_name, dp.pipeline_id, self._id).observe(dp.total_time)
-                PIPELINE_OVERFLOW_FLOWRATE.labels(dp.pipeline_name, dp.pipeline_id, self._id).inc()
+            metrics = self._get_metrics(dp)
+            metrics.overflow_time.observe(dp.total_time)
+            metrics.overflow_flowrate.inc()
             if overflow_callback:
                 overflow_callback(dp)
                 
@@ -615,9 +801,9 @@ class PipelineInstance:
             nonlocal outdated_callback
             end_dp(dp)
             dp.status = Status.OUTDATED
-            with self._lock:
-                PIPELINE_OUTDATED_TIME.labels(dp.pipeline_name, dp.pipeline_id, self._id).observe(dp.total_time)
-                PIPELINE_OUTDATED_FLOWRATE.labels(dp.pipeline_name, dp.pipeline_id, self._id).inc()
+            metrics = self._get_metrics(dp)
+            metrics.outdated_time.observe(dp.total_time)
+            metrics.outdated_flowrate.inc()
             if outdated_callback:
                 outdated_callback(dp)
         
@@ -625,9 +811,9 @@ class PipelineInstance:
             nonlocal error_callback
             end_dp(dp)
             dp.status = Status.ERROR
-            with self._lock:
-                PIPELINE_ERROR_TIME.labels(dp.pipeline_name, dp.pipeline_id, self._id).observe(dp.total_time)
-                PIPELINE_ERROR_FLOWRATE.labels(dp.pipeline_name, dp.pipeline_id, self._id).inc()
+            metrics = self._get_metrics(dp)
+            metrics.error_time.observe(dp.total_time)
+            metrics.error_flowrate.inc()
             if error_callback:
                 error_callback(dp)
 
@@ -659,7 +845,7 @@ class Pipeline(Generic[T]):
         self._id: str = f"P-{uuid.uuid4()}"
         self._name: str = name if name else self._id
         self._controllers: List[PipelineController] = []
-        self._instances_controllers: Dict[str, List[PipelineController]] = {} # Each instance has its own copy of the controllers
+        self._instances_controllers: Dict[str, Tuple[PipelineController, ...]] = {} # Each instance has its own copy of the controllers. Replaced as a whole, never mutated.
         self._pipeline_instances: Dict[str, PipelineInstance] = {} # Dict of instances
 
         self._lock = threading.Lock()
@@ -695,17 +881,16 @@ class Pipeline(Generic[T]):
         # for each instance create a deepcopy of the phases
         with self._lock:
             for ex_id in self._pipeline_instances:
-                self._instances_controllers[ex_id] = []
-                for con in self._controllers:
-                    copy_con = con.__deepcopy__({})
-                    self._instances_controllers[ex_id].append(copy_con)
+                copy_controllers = tuple(con.__deepcopy__({}) for con in self._controllers)
+                for copy_con in copy_controllers:
                     copy_con.init_phases()
+                self._instances_controllers[ex_id] = copy_controllers
 
     def register_instance(self) -> str:
         ex = PipelineInstance()
         with self._lock:
             self._pipeline_instances[ex.get_id()] = ex
-            self._instances_controllers[ex.get_id()] = []
+            self._instances_controllers[ex.get_id()] = ()
         self.set_phases()
         return ex._id
 
@@ -718,16 +903,18 @@ class Pipeline(Generic[T]):
         if ex:
             with self._lock:
                 del self._pipeline_instances[ex_id]
-                del self._instances_controllers[ex_id]
+                controllers = self._instances_controllers.pop(ex_id)
+            # The controllers are copies for this instance only, their workers are not needed anymore
+            for controller in controllers:
+                controller.shutdown(wait=False)
 
     def execute(self, data: T, instance_id: str, callback: Callable[[DataPackage[T]], None], exit_callback: Optional[Callable[[DataPackage[T]], None]] = None, overflow_callback: Optional[Callable[[DataPackage[T]], None]] = None, outdated_callback: Optional[Callable[[DataPackage[T]], None]] = None, error_callback: Optional[Callable[[DataPackage[T]], None]] = None) -> DataPackage[T]:
         ex = self._get_instance(instance_id)
         if not ex:
             raise ValueError("Instance ID not found")
         
-        temp_phases = []
-        with self._lock:
-            temp_phases = self._instances_controllers.get(instance_id, []).copy()
+        # The tuple is swapped as a whole by set_phases, so a plain read is a consistent snapshot
+        controllers = self._instances_controllers.get(instance_id, ())
 
         # Put data into DataPackage
         dp = DataPackage[T]()
@@ -739,5 +926,24 @@ class Pipeline(Generic[T]):
         dp.start_time=time.time()
 
         dp.status = Status.RUNNING
-        ex.execute(temp_phases, dp, callback, exit_callback, overflow_callback, outdated_callback, error_callback)
-        return dp
\ No newline at end of file
+        ex.execute(controllers, dp, callback, exit_callback, overflow_callback, outdated_callback, error_callback)
+        return dp
+
+    async def execute_async(self, data: T, instance_id: str) -> DataPackage[T]:
+        """
+        Executes the pipeline from an asyncio event loop. Returns the DataPackage once it left the pipeline,
+        no matter if it succeeded or not. Check DataPackage.status for the result.
+        The modules still run in the worker threads of the controllers, the event loop is not blocked.
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[DataPackage[T]] = loop.create_future()
+
+        def set_result(dp: DataPackage[T]) -> None:
+            if not future.done():
+                future.set_result(dp)
+
+        def done_callback(dp: DataPackage[T]) -> None:
+            loop.call_soon_threadsafe(set_result, dp)
+
+        self.execute(data, instance_id, done_callback, done_callback, done_callback, done_callback, done_callback)
+        return await future
\ No newline at end of file
@@ -42,12 +42,30 @@ class ThreadSafeClass(ABC):
                 self.__mutexes[name] = threading.Lock()
             
             with self.__mutexes[name]:
-                current_thread = threading.current_thread()
-                if hasattr(current_thread, 'timed_out') and current_thread.timed_out:
+                timed_out = getattr(threading.current_thread(), 'timed_out', None) # Set by Module for modules with a timeout
+                if timed_out is not None and timed_out.is_set():
                     raise RuntimeError("Modification not allowed: the thread handling this DataPackage has timed out.")
                 
                 self.__dict__[new_name] = value
 
+    def _set_attributes(self, values: Dict[str, Any]) -> None:
+        """
+        Sets several attributes in one call, including immutable ones. Used to update an instance from gRPC.
+        The timeout check of _set_attribute is done once for all values.
+        """
+        timed_out = getattr(threading.current_thread(), 'timed_out', None) # Set by Module for modules with a timeout
+        if timed_out is not None and timed_out.is_set():
+            raise RuntimeError("Modification not allowed: the thread handling this DataPackage has timed out.")
+
+        mutexes = self.__mutexes
+        attributes = self.__dict__
+        for name, value in values.items():
+            mutex = mutexes.get(name)
+            if mutex is None:
+                mutex = mutexes.setdefault(name, threading.Lock())
+            with mutex:
+                attributes["_" + name] = value
+
     def __deepcopy__(self, memo: Dict[int, Any]) -> Any:
         # TODO: Block acces to data, when deepcopy is called
         cls = self.__class__
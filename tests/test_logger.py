@@ -0,0 +1,77 @@
+import traceback
+import unittest
+from typing import Callable, List
+
+from stream_pipeline.logger import format_traceback
+
+
+def old_format_traceback(exc: BaseException) -> List[str]:
+    # The implementation format_traceback replaced, its output must stay the same
+    formatted_traceback: List[str] = []
+    for line in traceback.format_exception(type(exc), exc, exc.__traceback__):
+        if line.startswith('  File '):
+            parts = line.strip().split(',')
+            file_path = parts[0].split('"')[1]
+            line_number = parts[1].split(' ')[-1]
+            formatted_traceback.append(f"{file_path}:{line_number}")
+        else:
+            formatted_traceback.append(line.strip())
+    return formatted_traceback
+
+
+def recurse(n: int) -> int:
+    return recurse(n + 1)
+
+
+def recurse_limited(n: int) -> int:
+    if n == 0:
+        raise ValueError("end of recursion")
+    return recurse_limited(n - 1)
+
+
+def catch(func: Callable[[], object]) -> BaseException:
+    try:
+        func()
+    except BaseException as e:
+        return e
+    raise AssertionError("no exception raised")
+
+
+class FormatTracebackTest(unittest.TestCase):
+    def assert_same_as_old(self, exc: BaseException) -> List[str]:
+        formatted = format_traceback(traceback.TracebackException(type(exc), exc, exc.__traceback__))
+        self.assertEqual(formatted, old_format_traceback(exc))
+        return formatted
+
+    def test_recursion_is_collapsed(self) -> None:
+        formatted = self.assert_same_as_old(catch(lambda: recurse(0)))
+        self.assertLess(len(formatted), 20)
+        self.assertTrue(any(line.startswith("[Previous line repeated ") for line in formatted))
+
+    def test_few_repeats(self) -> None:
+        for depth in range(6):
+            self.assert_same_as_old(catch(lambda: recurse_limited(depth)))
+
+    def test_syntax_error(self) -> None:
+        formatted = self.assert_same_as_old(catch(lambda: compile("x = (", "<string>", "exec")))
+        self.assertIn("<string>:1", formatted)
+
+    def test_chained_exceptions(self) -> None:
+        def raise_chained() -> None:
+            try:
+                raise KeyError("cause")
+            except KeyError as e:
+                raise RuntimeError("effect") from e
+
+        def raise_in_handler() -> None:
+            try:
+                raise KeyError("context")
+            except KeyError:
+                raise RuntimeError("handler")
+
+        self.assert_same_as_old(catch(raise_chained))
+        self.assert_same_as_old(catch(raise_in_handler))
+
+
+if __name__ == '__main__':
+    unittest.main()